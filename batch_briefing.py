@@ -0,0 +1,107 @@
+"""Generate briefings for many zones without Streamlit, one JSON line per zone.
+
+    python batch_briefing.py zones.csv --output briefings.jsonl
+
+The zones file has one zone per line as "city" or "city,country" (a header
+line "city,country" is skipped). Zones are split into chunks that run in a
+process pool; inside each process a thread pool fetches weather and news for
+the chunk's zones concurrently, since those calls spend their time waiting on
+the network. Each finished chunk is written out at once, so output streams
+while the rest are still running. The weather and news caches live in each
+worker process, so repeated cities handled by one process share upstream calls.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+import briefing_store
+import logistics_core
+
+DEFAULT_COUNTRY = "es"
+THREADS_PER_PROCESS = 16
+
+
+def read_zones(path, default_country=DEFAULT_COUNTRY):
+    """[(city, country)] from a zones file"""
+    zones = []
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.reader(f):
+            if not row or not row[0].strip() or row[0].startswith("#"):
+                continue
+            if [c.strip().lower() for c in row[:2]] == ["city", "country"]:
+                continue
+            city = row[0].strip()
+            country = row[1].strip() if len(row) > 1 and row[1].strip() else default_country
+            zones.append((city, country))
+    return zones
+
+
+def _safe_briefing(zone, weather_key, news_key):
+    city, country = zone
+    try:
+        return logistics_core.build_briefing(city, country, weather_key, news_key)
+    except Exception as e:
+        return {"zone": city, "country": country, "error": str(e)}
+
+
+def brief_chunk(zones, weather_key, news_key, threads=THREADS_PER_PROCESS):
+    """Briefings for a chunk of zones, fetched by a thread pool (runs in a worker process)"""
+    with ThreadPoolExecutor(max_workers=min(threads, len(zones)) or 1) as pool:
+        return list(pool.map(lambda zone: _safe_briefing(zone, weather_key, news_key), zones))
+
+
+def iter_briefings(zones, weather_key, news_key, processes=None, threads=THREADS_PER_PROCESS):
+    """Yield briefings as their chunks finish (not in input order)"""
+    processes = processes or os.cpu_count() or 1
+    chunks = [zones[i:i + threads] for i in range(0, len(zones), threads)]
+    if processes == 1:
+        for chunk in chunks:
+            yield from brief_chunk(chunk, weather_key, news_key, threads)
+        return
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        futures = [pool.submit(brief_chunk, chunk, weather_key, news_key, threads) for chunk in chunks]
+        for future in as_completed(futures):
+            yield from future.result()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate courier zone briefings as JSON lines")
+    parser.add_argument("zones", help='file with one "city" or "city,country" per line')
+    parser.add_argument("--output", default="-", help="JSONL file (default: stdout)")
+    parser.add_argument("--country", default=DEFAULT_COUNTRY, help="country code for zones without one")
+    parser.add_argument("--processes", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--threads", type=int, default=THREADS_PER_PROCESS, help="threads per process")
+    parser.add_argument("--weather-key", default=os.getenv("OPENWEATHERMAP_API_KEY", ""))
+    parser.add_argument("--news-key", default=os.getenv("NEWSAPI_API_KEY", ""))
+    parser.add_argument("--history", action="store_true", help="also append briefings to the briefing history")
+    args = parser.parse_args()
+
+    if not args.weather_key or not args.news_key:
+        parser.error("set OPENWEATHERMAP_API_KEY and NEWSAPI_API_KEY or pass --weather-key/--news-key")
+
+    zones = read_zones(args.zones, args.country)
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+
+    started = time.monotonic()
+    count = 0
+    try:
+        for briefing in iter_briefings(zones, args.weather_key, args.news_key, args.processes, args.threads):
+            out.write(json.dumps(briefing, ensure_ascii=False, default=str) + "\n")
+            out.flush()
+            if args.history and "error" not in briefing:
+                briefing_store.append(briefing)
+            count += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        if args.history:
+            briefing_store.get_store().flush()
+    print(f"{count} briefings in {time.monotonic() - started:.1f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
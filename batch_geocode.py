@@ -0,0 +1,186 @@
+"""Batch geocoding for delivery manifests.
+
+A manifest can hold thousands of addresses, many of them repeated. The batch
+pipeline deduplicates the input by normalized address, answers what it can
+from the geocode store, and fills the misses in parallel. Each provider has its
+own token bucket so parallel workers never exceed its request rate (Nominatim
+allows 1 request per second). Progress is streamed back as each address
+completes, and the final result is a pandas DataFrame in input order.
+
+    python batch_geocode.py manifest.csv --column address --provider nominatim
+"""
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+
+import geocode_store
+import provider_client
+from geocode_store import MISS, normalize_address
+
+# provider -> (requests per second, burst size)
+PROVIDER_LIMITS = {
+    "nominatim": (1.0, 1),
+    "tomtom": (5.0, 5),
+}
+
+
+class TokenBucket:
+    """Blocking token bucket: acquire() waits until a request may be sent"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def get_bucket(provider):
+    """Process-wide bucket for `provider`, so concurrent batches share the limit"""
+    with _buckets_lock:
+        if provider not in _buckets:
+            rate, burst = PROVIDER_LIMITS.get(provider, (1.0, 1))
+            _buckets[provider] = TokenBucket(rate, burst)
+        return _buckets[provider]
+
+
+def tomtom_lookup(api_key):
+    """Return a lookup(address) -> (lat, lon) | None backed by TomTom Search"""
+    def lookup(address):
+        url = f"https://api.tomtom.com/search/2/geocode/{address}.json?key={api_key}"
+        response = provider_client.get(url)
+        response.raise_for_status()
+        results = response.json().get("results")
+        if results:
+            position = results[0]["position"]
+            return position["lat"], position["lon"]
+        return None
+    return lookup
+
+
+def nominatim_lookup(user_agent="delivery_app"):
+    """Return a lookup(address) -> (lat, lon) | None backed by Nominatim"""
+    from geopy.geocoders import Nominatim
+
+    geolocator = Nominatim(user_agent=user_agent)
+    return lambda address: geocode_store.location_to_point(geolocator.geocode(address))
+
+
+def iter_geocode(addresses, provider, lookup, max_workers=8, store=None):
+    """Geocode `addresses`, yielding one progress event per unique address.
+
+    Events are dicts with `done`, `total`, `address`, `lat`, `lon` and
+    `source` ("cache", "api", "not_found" or "error"). Cached addresses are
+    reported first, then API results as they complete.
+    """
+    store = store or geocode_store.get_store()
+    unique = {}
+    for address in addresses:
+        unique.setdefault(normalize_address(address), address)
+    total = len(unique)
+    done = 0
+
+    misses = []
+    for address in unique.values():
+        point = store.lookup(address)
+        if point is MISS:
+            misses.append(address)
+            continue
+        done += 1
+        yield _event(done, total, address, point, "cache" if point else "not_found")
+
+    bucket = get_bucket(provider)
+
+    def fetch(address):
+        bucket.acquire()
+        return lookup(address)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(fetch, address): address for address in misses}
+        for future in as_completed(futures):
+            address = futures[future]
+            done += 1
+            try:
+                point = future.result()
+            except Exception:
+                # Not stored, so the address is retried by the next batch
+                yield _event(done, total, address, None, "error")
+                continue
+            store.store(address, provider, point)
+            yield _event(done, total, address, point, "api" if point else "not_found")
+
+
+def _event(done, total, address, point, source):
+    lat, lon = point if point else (None, None)
+    return {"done": done, "total": total, "address": address, "lat": lat, "lon": lon, "source": source}
+
+
+def geocode_batch(addresses, provider, lookup, max_workers=8, on_progress=None, store=None):
+    """Geocode a whole manifest and return a DataFrame in input order.
+
+    Columns: address, lat, lon, source. `on_progress(done, total)` is called
+    after every unique address (e.g. to drive st.progress).
+    """
+    addresses = list(addresses)
+    resolved = {}
+    for event in iter_geocode(addresses, provider, lookup, max_workers=max_workers, store=store):
+        resolved[normalize_address(event["address"])] = event
+        if on_progress is not None:
+            on_progress(event["done"], event["total"])
+
+    keys = [normalize_address(address) for address in addresses]
+    return pd.DataFrame({
+        "address": addresses,
+        "lat": [resolved[key]["lat"] for key in keys],
+        "lon": [resolved[key]["lon"] for key in keys],
+        "source": [resolved[key]["source"] for key in keys],
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Geocode a delivery manifest CSV")
+    parser.add_argument("manifest", help="CSV file with one address per row")
+    parser.add_argument("--column", default="address", help="column holding the address")
+    parser.add_argument("--provider", choices=sorted(PROVIDER_LIMITS), default="nominatim")
+    parser.add_argument("--tomtom-key", default="", help="TomTom API key (provider=tomtom)")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--output", default="geocoded.csv")
+    args = parser.parse_args()
+
+    manifest = pd.read_csv(args.manifest)
+    if args.provider == "tomtom":
+        lookup = tomtom_lookup(args.tomtom_key)
+    else:
+        lookup = nominatim_lookup()
+
+    def report(done, total):
+        print(f"\r{done}/{total} addresses", end="", flush=True)
+
+    result = geocode_batch(manifest[args.column].astype(str), args.provider, lookup,
+                           max_workers=args.workers, on_progress=report)
+    print()
+    result.to_csv(args.output, index=False)
+    print(f"Wrote {len(result)} rows to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
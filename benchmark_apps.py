@@ -0,0 +1,174 @@
+"""Time each app variant's start-up and rerun path against logistics_core.
+
+    python benchmark_apps.py [app.py ...] [--reruns 10] [--json results.json]
+    python benchmark_apps.py --baseline results.json [--tolerance 0.2]
+
+Each variant runs in a fresh interpreter under Streamlit's AppTest:
+
+- startup: the app's module-level imports plus its first script run (what a
+  new session waits for before the first paint). Streamlit itself is already
+  imported, so variants are compared on their own cost,
+- rerun: median and p95 of --reruns further runs without widget changes,
+  which is what every click or keystroke costs.
+
+The "core" row measures `import logistics_core` plus one build_briefing
+call, then build_briefing again for each rerun, so the cost the apps add on
+top of the shared code is visible. With --baseline, a variant whose startup or
+rerun median is slower than the baseline by more than --tolerance is
+reported as a regression and the exit status is 1.
+
+Provider calls use OPENWEATHERMAP_API_KEY / NEWSAPI_API_KEY (or --weather-key
+/ --news-key). Without them, or without network access, the apps take their
+error paths, which is still the code each rerun runs.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CORE = "core"
+DEFAULT_VARIANTS = [
+    CORE,
+    "courier_app_fixed.py",
+    "courier_app_fixed (1).py",
+    "deff_app (2).py",
+    "trial_1",
+    "Final2_lg",
+    "Final_logistics.py",
+    "courier_briefing_app.py",
+    "courier_briefing_app_clean.py",
+    "courier_briefing_app_final.py",
+    "courier_briefing_app_pure.py",
+    "courier_briefing_app_v2.py",
+]
+DEFAULT_RERUNS = 10
+# Seconds AppTest waits for one script run
+APP_TIMEOUT = 120
+CORE_ZONE = ("Barcelona", "es")
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def measure_core(reruns, weather_key, news_key):
+    """{"startup", "reruns"} in seconds for the core package alone"""
+    city, country = CORE_ZONE
+    started = time.perf_counter()
+    import logistics_core
+    logistics_core.build_briefing(city, country, weather_key, news_key)
+    startup = time.perf_counter() - started
+
+    times = []
+    for _ in range(reruns):
+        started = time.perf_counter()
+        logistics_core.build_briefing(city, country, weather_key, news_key)
+        times.append(time.perf_counter() - started)
+    return {"startup": startup, "reruns": times, "errors": []}
+
+
+def measure_app(path, reruns):
+    """{"startup", "reruns", "errors"} in seconds for one Streamlit script"""
+    from streamlit.testing.v1 import AppTest
+
+    started = time.perf_counter()
+    app = AppTest.from_file(path, default_timeout=APP_TIMEOUT)
+    app.run()
+    startup = time.perf_counter() - started
+
+    times = []
+    for _ in range(reruns):
+        started = time.perf_counter()
+        app.run()
+        times.append(time.perf_counter() - started)
+    return {"startup": startup, "reruns": times, "errors": [e.value for e in app.exception]}
+
+
+def run_variant(target, reruns, weather_key, news_key):
+    """Measure `target` in a fresh interpreter; returns the summary row"""
+    env = dict(os.environ, OPENWEATHERMAP_API_KEY=weather_key, NEWSAPI_API_KEY=news_key)
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--worker", target, "--reruns", str(reruns)],
+        cwd=HERE, env=env, capture_output=True, text=True,
+    )
+    try:
+        raw = json.loads(result.stdout.strip().splitlines()[-1])
+    except (IndexError, ValueError):
+        error = (result.stderr.strip().splitlines() or ["no output"])[-1]
+        return {"variant": target, "error": error}
+    row = {"variant": target, "startup_ms": raw["startup"] * 1000}
+    if raw["reruns"]:
+        row["rerun_median_ms"] = statistics.median(raw["reruns"]) * 1000
+        row["rerun_p95_ms"] = _percentile(raw["reruns"], 0.95) * 1000
+    if raw["errors"]:
+        row["error"] = raw["errors"][0]
+    return row
+
+
+def regressions(rows, baseline, tolerance):
+    """[(variant, metric, baseline ms, current ms)] slower than baseline by more than `tolerance`"""
+    before = {row["variant"]: row for row in baseline}
+    found = []
+    for row in rows:
+        old = before.get(row["variant"])
+        if old is None:
+            continue
+        for metric in ("startup_ms", "rerun_median_ms"):
+            if metric in row and metric in old and row[metric] > old[metric] * (1 + tolerance):
+                found.append((row["variant"], metric, old[metric], row[metric]))
+    return found
+
+
+def _fmt(value):
+    return f"{value:10.1f}" if value is not None else f"{'-':>10}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark app variants against logistics_core")
+    parser.add_argument("variants", nargs="*", default=DEFAULT_VARIANTS,
+                        help=f"scripts to time, or '{CORE}' for the package alone (default: all)")
+    parser.add_argument("--reruns", type=int, default=DEFAULT_RERUNS)
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--baseline", help="results file from an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown vs baseline (0.2 = 20%%)")
+    parser.add_argument("--weather-key", default=os.getenv("OPENWEATHERMAP_API_KEY", "benchmark"))
+    parser.add_argument("--news-key", default=os.getenv("NEWSAPI_API_KEY", "benchmark"))
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        if args.worker == CORE:
+            result = measure_core(args.reruns, args.weather_key, args.news_key)
+        else:
+            result = measure_app(args.worker, args.reruns)
+        print(json.dumps(result))
+        return
+
+    rows = []
+    print(f"{'variant':<32}{'startup ms':>10}{'rerun ms':>10}{'p95 ms':>10}")
+    for target in args.variants:
+        row = run_variant(target, args.reruns, args.weather_key, args.news_key)
+        rows.append(row)
+        print(f"{target:<32}{_fmt(row.get('startup_ms'))}{_fmt(row.get('rerun_median_ms'))}"
+              f"{_fmt(row.get('rerun_p95_ms'))}" + (f"  error: {row['error']}" if "error" in row else ""))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            slower = regressions(rows, json.load(f), args.tolerance)
+        for variant, metric, old, new in slower:
+            print(f"REGRESSION {variant} {metric}: {old:.1f} -> {new:.1f} ms")
+        if slower:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""Briefing engine: runs every zone data source at the same time.
+
+The apps used to call get_weather, get_news and estimate_delivery_load one
+after another, so a briefing took the sum of all source latencies. Here every
+source is submitted to a shared thread pool and collected under one deadline,
+so the slowest source sets the latency. A source that fails or misses the
+deadline is replaced by its fallback value instead of blocking the briefing.
+"""
+from concurrent.futures import ThreadPoolExecutor, wait
+
+# Seconds a whole briefing may take; sources still running after it are dropped
+DEFAULT_DEADLINE = 12
+
+# Shared pool so each briefing doesn't pay thread start-up on every rerun
+_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="briefing")
+
+
+def run_sources(sources, fallbacks=None, deadline=DEFAULT_DEADLINE):
+    """Run all data sources concurrently and return their results by name.
+
+    `sources` maps a name to a zero-argument callable. `fallbacks` maps a name
+    to the value used when that source raises or does not finish before the
+    deadline (None if not given).
+    """
+    fallbacks = fallbacks or {}
+    futures = {name: _executor.submit(fn) for name, fn in sources.items()}
+    wait(futures.values(), timeout=deadline)
+
+    results = {}
+    for name, future in futures.items():
+        if future.done() and future.exception() is None:
+            results[name] = future.result()
+        else:
+            # Late sources keep running in the pool but nobody waits for them
+            future.cancel()
+            results[name] = fallbacks.get(name)
+    return results
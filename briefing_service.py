@@ -0,0 +1,297 @@
+"""JSON HTTP service for the briefing pieces, without Streamlit.
+
+    python briefing_service.py --port 8080
+
+In-cab devices and dispatch tools used to get a briefing only by running a
+whole Streamlit script, CSS injection included. This service exposes the same
+pieces (from logistics_core, traffic_sim/traffic_profile and route_optimizer)
+as JSON endpoints on an asyncio server from the standard library, with HTTP/1.1
+keep-alive:
+
+    GET  /weather?city=Barcelona
+    GET  /news?city=Barcelona&country=es
+    GET  /traffic?city=Barcelona[&hour=8]
+    GET  /safety?city=Barcelona
+    GET  /gas-stations?city=Barcelona          (or ?lat=..&lon=..)
+    GET  /briefing?city=Barcelona&country=es
+    POST /route   {"depot": [lat, lon], "stops": [{"lat": .., "lon": ..}, ..], "capacity": 20}
+    GET  /health
+
+Answers come from the same process-wide caches the apps use (weather, news,
+traffic). Calls that may block on an upstream API or the route optimizer,
+cache lookups with a loader included, run in a thread pool, so a slow
+provider never stalls other connections.
+"""
+import argparse
+import asyncio
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import parse_qs, urlsplit
+
+import logistics_core
+import map_cache
+import provider_client
+import route_optimizer
+import shared_cache
+import traffic_profile
+import traffic_sim
+
+MAX_BODY_BYTES = 1024 * 1024
+# Stops accepted by /route and optimizer time per request
+MAX_ROUTE_STOPS = 500
+ROUTE_TIME_LIMIT = 2.0
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error"}
+
+_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="service")
+_routes = {}
+_keys = {"weather": os.getenv("OPENWEATHERMAP_API_KEY", ""), "news": os.getenv("NEWSAPI_API_KEY", "")}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def route(path, method="GET"):
+    """Register an async handler(params, body) -> JSON-serializable result"""
+    def register(handler):
+        _routes[path] = (method, handler)
+        return handler
+    return register
+
+
+def _param(params, name, default=None):
+    value = params.get(name, default)
+    if value is None or value == "":
+        raise HTTPError(400, f"missing query parameter '{name}'")
+    return value
+
+
+async def _blocking(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(_executor, fn, *args)
+
+
+async def _weather(city):
+    # Even a cache hit may load on the calling thread (stale or evicted entry)
+    return await _blocking(logistics_core.get_weather, city, _keys["weather"])
+
+
+@route("/health")
+async def health(params, body):
+    return {"status": "ok"}
+
+
+@route("/weather")
+async def weather(params, body):
+    city = _param(params, "city")
+    ok, data = await _weather(city)
+    return {"city": city, "ok": ok, "weather": data if ok else None, "error": None if ok else data}
+
+
+@route("/news")
+async def news(params, body):
+    city = _param(params, "city")
+    country = _param(params, "country", "es")
+    ok, items = await _blocking(logistics_core.get_news, country, city, _keys["news"])
+    return {"city": city, "country": country, "ok": ok, "news": items}
+
+
+@route("/traffic")
+async def traffic(params, body):
+    city = _param(params, "city")
+    hour = int(params.get("hour", datetime.now().hour))
+    if not 0 <= hour < 24:
+        raise HTTPError(400, "hour must be between 0 and 23")
+    curve = traffic_sim.simulated_traffic(city)
+    intensity = float(curve[hour])
+    level, status, _ = logistics_core.traffic_level(intensity)
+    windows = traffic_profile.optimal_windows(traffic_profile.scale_to_ten(curve))[0]
+    return {"city": city, "hour": hour, "intensity": round(intensity, 3), "level": level, "status": status,
+            "hourly": [round(float(v), 3) for v in curve], "optimal_windows": windows}
+
+
+@route("/safety")
+async def safety(params, body):
+    city = _param(params, "city")
+    ok, data = await _weather(city)
+    return {"city": city, "tips": logistics_core.get_safety_tips(data if ok else None)}
+
+
+@route("/gas-stations")
+async def gas_stations(params, body):
+    if "lat" in params and "lon" in params:
+        lat, lon = float(params["lat"]), float(params["lon"])
+    else:
+        city = _param(params, "city")
+        ok, data = await _weather(city)
+        if not ok:
+            return {"level": "Unknown", "details": "Weather data required to find nearby stations"}
+        lat, lon = data["lat"], data["lon"]
+    level, details, _ = logistics_core.find_gas_stations(lat, lon)
+    return {"lat": lat, "lon": lon, "level": level, "details": details}
+
+
+@route("/briefing")
+async def briefing(params, body):
+    city = _param(params, "city")
+    country = _param(params, "country", "es")
+    return await _blocking(logistics_core.build_briefing, city, country, _keys["weather"], _keys["news"])
+
+
+def _coordinate(value, name, limit):
+    """`value` as a float in [-limit, limit]; HTTPError 400 naming `name` otherwise"""
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not -limit <= value <= limit:
+        raise HTTPError(400, f"{name} must be a number between -{limit} and {limit}")
+    return float(value)
+
+
+def _point(lat, lon, name):
+    return _coordinate(lat, f"{name} lat", 90), _coordinate(lon, f"{name} lon", 180)
+
+
+def _number(value, name, positive=False):
+    """`value` as a float >= 0 (> 0 if `positive`); HTTPError 400 naming `name` otherwise"""
+    if (isinstance(value, bool) or not isinstance(value, (int, float)) or value != value
+            or value < 0 or (positive and value == 0)):
+        raise HTTPError(400, f"{name} must be a {'positive' if positive else 'non-negative'} number")
+    return float(value)
+
+
+def _stop(stop, name):
+    """Check one /route stop: coordinates, and demand, service and window if given"""
+    if not isinstance(stop, dict):
+        raise HTTPError(400, f"{name} must be an object with lat and lon")
+    _point(stop.get("lat"), stop.get("lon"), name)
+    for field in ("demand", "service"):
+        if field in stop:
+            _number(stop[field], f"{name} {field}")
+    window = stop.get("window")
+    if window is not None:
+        if not isinstance(window, list) or len(window) != 2:
+            raise HTTPError(400, f"{name} window must be [start, end] in minutes")
+        start, end = (_number(v, f"{name} window") for v in window)
+        if start > end:
+            raise HTTPError(400, f"{name} window starts after it ends")
+
+
+@route("/route", method="POST")
+async def plan_route(params, body):
+    try:
+        request = json.loads(body or b"{}")
+        depot = request["depot"]
+        stops = request["stops"]
+        if len(depot) != 2 or not isinstance(stops, list):
+            raise ValueError
+    except (ValueError, KeyError, TypeError):
+        raise HTTPError(400, 'body must be JSON with "depot": [lat, lon] and "stops": [{"lat", "lon"}, ...]')
+    if len(stops) > MAX_ROUTE_STOPS:
+        raise HTTPError(400, f"at most {MAX_ROUTE_STOPS} stops per request")
+    depot = _point(depot[0], depot[1], "depot")
+    for i, stop in enumerate(stops):
+        _stop(stop, f"stop {i}")
+    capacity = request.get("capacity")
+    if capacity is not None:
+        _number(capacity, "capacity", positive=True)
+    key = map_cache.content_key(depot=depot, stops=stops, capacity=capacity)
+    return await _blocking(
+        shared_cache.get_cache("route").get, key,
+        lambda: route_optimizer.optimize_route(depot, stops, capacity=capacity, time_limit=ROUTE_TIME_LIMIT),
+    )
+
+
+async def _dispatch(method, target, body):
+    url = urlsplit(target)
+    entry = _routes.get(url.path.rstrip("/") or "/")
+    if entry is None:
+        return 404, {"error": f"no endpoint {url.path}"}
+    expected, handler = entry
+    if method != expected:
+        return 405, {"error": f"use {expected}"}
+    params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+    try:
+        return 200, await handler(params, body)
+    except HTTPError as e:
+        return e.status, {"error": str(e)}
+    except ValueError as e:
+        return 400, {"error": str(e)}
+    except Exception as e:
+        return 500, {"error": provider_client.error_text(e)}
+
+
+async def _handle(reader, writer):
+    try:
+        while True:
+            try:
+                head = await reader.readuntil(b"\r\n\r\n")
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                break
+            request_line, *header_lines = head.decode("latin-1").rstrip("\r\n").split("\r\n")
+            try:
+                method, target, version = request_line.split(" ", 2)
+            except ValueError:
+                break
+            headers = {}
+            for line in header_lines:
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            try:
+                length = int(headers.get("content-length") or 0)
+            except ValueError:
+                length = -1
+            if length < 0:
+                # The body cannot be framed, so the connection cannot be reused
+                status, payload = 400, {"error": "invalid Content-Length"}
+                keep_alive = False
+            elif length > MAX_BODY_BYTES:
+                status, payload = 413, {"error": "request body too large"}
+                keep_alive = False
+            else:
+                body = await reader.readexactly(length) if length else b""
+                status, payload = await _dispatch(method, target, body)
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+
+            data = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+            writer.write(
+                f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                f"Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(data)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + data
+            )
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host="0.0.0.0", port=8080):
+    server = await asyncio.start_server(_handle, host, port, backlog=1024)
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve courier briefing data as JSON")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--weather-key", default=_keys["weather"])
+    parser.add_argument("--news-key", default=_keys["news"])
+    args = parser.parse_args()
+
+    if not args.weather_key or not args.news_key:
+        parser.error("set OPENWEATHERMAP_API_KEY and NEWSAPI_API_KEY or pass --weather-key/--news-key")
+    _keys.update(weather=args.weather_key, news=args.news_key)
+    print(f"Serving briefings on http://{args.host}:{args.port}")
+    asyncio.run(serve(args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
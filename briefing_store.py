@@ -0,0 +1,184 @@
+"""Append-only briefing history in SQLite.
+
+"Save Briefing to JSON" used to overwrite a single last_briefing.json, so each
+save lost the previous one and concurrent sessions wrote over each other.
+Here every saved briefing is appended as a row to a WAL-mode SQLite database
+with indexes on zone and time, so history can be queried by zone and date
+range ("all Barcelona briefings last week"). Writes are queued and committed
+in batches by one background thread, so saving never blocks the Streamlit
+script thread. A batch that fails is retried once; if it fails again it is
+logged, counted in `failed_rows`, and the next flush() raises
+BriefingWriteError.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from weather_cache import normalize_city
+
+BRIEFING_DB_PATH = os.getenv(
+    "BRIEFING_DB_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "briefing_history.sqlite")
+)
+# Rows committed per transaction at most
+WRITE_BATCH = 500
+# Seconds before a failed batch is retried (e.g. the database was locked)
+RETRY_DELAY = 1.0
+
+log = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS briefing (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    zone_key   TEXT NOT NULL,
+    zone       TEXT NOT NULL,
+    country    TEXT,
+    created_at REAL NOT NULL,
+    payload    TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS briefing_zone_time ON briefing (zone_key, created_at);
+CREATE INDEX IF NOT EXISTS briefing_time ON briefing (created_at);
+"""
+
+
+class BriefingWriteError(Exception):
+    """Queued briefings could not be written to the history database"""
+
+
+def _epoch(value):
+    """datetime, ISO string or epoch seconds -> epoch seconds"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if isinstance(value, datetime):
+        return value.timestamp()
+    return float(value)
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class BriefingStore:
+    """Briefing history with a background batch writer"""
+
+    def __init__(self, path=BRIEFING_DB_PATH):
+        self.path = path
+        self._conn = _connect(path)
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        # Briefings dropped after a failed retry, and the error that dropped them
+        self.failed_rows = 0
+        self.last_error = None
+        self._writer = threading.Thread(target=self._write_loop, name="briefing-writer", daemon=True)
+        self._writer.start()
+
+    def append(self, briefing):
+        """Queue a briefing dict (with at least "zone") for writing; returns immediately"""
+        created_at = _epoch(briefing.get("timestamp")) or time.time()
+        row = (normalize_city(briefing["zone"]), briefing["zone"], briefing.get("country"), created_at,
+               json.dumps(briefing, default=str))
+        self._queue.put(row)
+
+    def flush(self):
+        """Block until every queued briefing is written; raises BriefingWriteError if any was dropped"""
+        failed = self.failed_rows
+        self._queue.join()
+        if self.failed_rows > failed:
+            raise BriefingWriteError(
+                f"{self.failed_rows - failed} briefings could not be saved: {self.last_error}"
+            )
+
+    def _insert(self, conn, rows):
+        with conn:
+            conn.executemany(
+                "INSERT INTO briefing (zone_key, zone, country, created_at, payload) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def _write_loop(self):
+        conn = _connect(self.path)
+        while True:
+            rows = [self._queue.get()]
+            while len(rows) < WRITE_BATCH:
+                try:
+                    rows.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                try:
+                    self._insert(conn, rows)
+                except sqlite3.Error:
+                    time.sleep(RETRY_DELAY)
+                    self._insert(conn, rows)
+            except sqlite3.Error as e:
+                # Keep the writer alive; the batch is dropped rather than retried forever
+                log.error("briefing history: dropped %d briefings: %s", len(rows), e)
+                self.last_error = e
+                self.failed_rows += len(rows)
+            finally:
+                for _ in rows:
+                    self._queue.task_done()
+
+    def query(self, zone=None, since=None, until=None, limit=None):
+        """Briefings (oldest first), optionally for one zone and a [since, until) range"""
+        clauses, params = [], []
+        if zone is not None:
+            clauses.append("zone_key = ?")
+            params.append(normalize_city(zone))
+        if since is not None:
+            clauses.append("created_at >= ?")
+            params.append(_epoch(since))
+        if until is not None:
+            clauses.append("created_at < ?")
+            params.append(_epoch(until))
+        sql = "SELECT payload FROM briefing"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY created_at"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [json.loads(payload) for (payload,) in rows]
+
+    def latest(self, zone):
+        """Most recent briefing for `zone`, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload FROM briefing WHERE zone_key = ? ORDER BY created_at DESC LIMIT 1",
+                (normalize_city(zone),),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Process-wide store, opened on first use"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = BriefingStore()
+                atexit.register(_store.flush)
+    return _store
+
+
+def append(briefing):
+    """Shortcut for get_store().append(...)"""
+    get_store().append(briefing)
@@ -1,13 +1,11 @@
 import streamlit as st
-import requests
-from datetime import datetime, timedelta
-import json
-import pandas as pd
-import pydeck as pdk
+import briefing_store
+from logistics_core import find_gas_stations, generate_map, get_safety_tips, simulated_news
+from logistics_core.ui import get_news, get_weather
+import traffic_chart
+from datetime import datetime
 import time
 import os
-import random
-import altair as alt
 from io import BytesIO
 
 # Set page configuration
@@ -54,285 +52,15 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Functions from original script
-def get_weather(city, api_key):
-    """Get weather information for a city"""
-    with st.spinner(f"Fetching weather data for {city}..."):
-        api_key = api_key.strip()
-        url = f"https://api.openweathermap.org/data/2.5/weather?q={city}&appid={api_key}&units=metric"
-        
-        try:
-            response = requests.get(url, timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                weather = data["weather"][0]["description"].capitalize()
-                temp = data["main"]["temp"]
-                icon = data["weather"][0]["icon"]
-                humidity = data["main"]["humidity"]
-                wind_speed = data["wind"]["speed"]
-                
-                # Get coordinates for map
-                lat = data["coord"]["lat"]
-                lon = data["coord"]["lon"]
-                
-                weather_details = {
-                    "description": weather,
-                    "temp": temp,
-                    "icon": icon,
-                    "humidity": humidity,
-                    "wind_speed": wind_speed,
-                    "lat": lat,
-                    "lon": lon
-                }
-                
-                return True, weather_details
-            elif response.status_code == 401:
-                return False, "API key error. Please check your OpenWeatherMap API key."
-            elif response.status_code == 404:
-                return False, f"City '{city}' not found. Please check spelling."
-            
-            return False, f"Weather API error (Status: {response.status_code})"
-        
-        except requests.exceptions.RequestException as e:
-            return False, f"Network error while fetching weather data: {str(e)}"
-
-def get_news(country_code, city, api_key):
-    """Get news headlines for a location"""
-    with st.spinner(f"Fetching local news for {city}, {country_code.upper()}..."):
-        api_key = api_key.strip()
-        
-        # Format the city parameter correctly (spaces to +)
-        formatted_city = city.replace(" ", "+")
-        
-        # Improved API call with better error handling
-        url = f"https://newsapi.org/v2/top-headlines?country={country_code}&q={formatted_city}&apiKey={api_key}"
-        
-        try:
-            response = requests.get(url, timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                articles = data.get("articles", [])
-                
-                if not articles:
-                    # Fallback to general news
-                    url = f"https://newsapi.org/v2/top-headlines?country={country_code}&category=general&apiKey={api_key}"
-                    response = requests.get(url, timeout=10)
-                    
-                    if response.status_code == 200:
-                        data = response.json()
-                        articles = data.get("articles", [])
-                    else:
-                        st.warning("Failed to fetch fallback news. Using simulated data.")
-                        # Provide simulated news when API fails
-                        return True, get_simulated_news(city)
-                
-                relevant_articles = []
-                for article in articles[:10]:
-                    if article.get("title"):
-                        title = article.get("title", "").lower()
-                        if any(keyword in title for keyword in ["traffic", "road", "accident", "protest", "closure"]):
-                            relevant_articles.append(article)
-                
-                display_articles = relevant_articles[:5] if relevant_articles else articles[:5]
-                
-                if display_articles:
-                    news_items = []
-                    for article in display_articles:
-                        news_items.append({
-                            "title": article.get("title", "No title available"),
-                            "url": article.get("url", "#"),
-                            "source": article.get("source", {}).get("name", "Unknown") if article.get("source") else "Unknown"
-                        })
-                    return True, news_items
-                else:
-                    return True, [{"title": "No significant news affecting deliveries at this time", "url": "#", "source": "System"}]
-            
-            elif response.status_code == 401:
-                st.warning("API key error. Using simulated news data.")
-                return True, get_simulated_news(city)
-            elif response.status_code == 429:
-                st.warning("Too many requests. Using simulated news data.")
-                return True, get_simulated_news(city)
-            else:
-                # Fallback for any other error
-                st.warning(f"Error fetching news (Status: {response.status_code}). Using simulated data.")
-                return True, get_simulated_news(city)
-        
-        except Exception as e:
-            st.warning(f"Error fetching news: {str(e)}. Using simulated data.")
-            return True, get_simulated_news(city)
-
-def get_simulated_news(city):
-    """Generate simulated news when API fails"""
-    return [
-        {
-            "title": f"Traffic delays reported on main avenue in {city} due to construction",
-            "url": "#",
-            "source": "Traffic Update"
-        },
-        {
-            "title": f"New delivery routes established in {city} downtown area",
-            "url": "#",
-            "source": "Courier News"
-        },
-        {
-            "title": f"Weather conditions affecting delivery times in {city} suburban areas",
-            "url": "#",
-            "source": "Weather Alert"
-        },
-        {
-            "title": f"Local businesses report increased delivery demands in {city}",
-            "url": "#",
-            "source": "Business Times"
-        }
-    ]
-
-def find_gas_stations(lat, lon):
-    """Find gas stations near the specified location"""
-    now = datetime.now().hour
-    
-    # Simple time-based patterns
-    if 7 <= now <= 10:  # Morning commute
-        return "High", f"5+ gas stations open within 3km radius", "🟢"
-    elif 17 <= now <= 20:  # Evening commute
-        return "Medium", f"3-4 gas stations open within 3km radius", "🟡"
-    elif 22 <= now <= 6:  # Late night
-        return "Low", f"Limited gas stations open for 24h service", "🔴"
-    else:
-        return "Medium", "Normal gas station operations in your area", "🟡"
-
-def get_safety_tips(weather_data):
-    """Generate safety tips based on weather conditions"""
-    if not isinstance(weather_data, dict):
-        return ["No specific weather-related safety concerns. Proceed normally."]
-    
-    tips = []
-    temp = weather_data.get("temp", 20)
-    description = weather_data.get("description", "").lower()
-    
-    if "rain" in description or "shower" in description:
-        tips.append("Roads may be slippery. Maintain safe distance and reduce speed.")
-    elif "snow" in description:
-        tips.append("Snow conditions reported. Use winter equipment and drive cautiously.")
-    elif "fog" in description:
-        tips.append("Reduced visibility. Use fog lights and reduce speed.")
-    elif "storm" in description or "thunder" in description:
-        tips.append("Stormy conditions. Seek shelter if lightning intensifies.")
-    
-    if temp >= 30:
-        tips.append("High temperature. Stay hydrated and avoid prolonged sun exposure.")
-    elif temp <= 5:
-        tips.append("Cold temperature. Wear appropriate clothing and watch for ice.")
-        
-    if not tips:
-        tips.append("No specific weather-related safety concerns. Proceed normally.")
-        
-    return tips
-
-def generate_map(lat, lon, zoom=12):
-    """Generate an interactive 3D map for the location"""
-    # Set the viewport location
-    view_state = pdk.ViewState(
-        longitude=lon,
-        latitude=lat,
-        zoom=zoom,
-        min_zoom=5,
-        max_zoom=15,
-        pitch=40.5,
-        bearing=-27.36
-    )
-
-    # Create layer for the center point
-    center_layer = pdk.Layer(
-        "ScatterplotLayer",
-        data=[{"position": [lon, lat], "color": [0, 0, 255], "radius": 100}],
-        get_position="position",
-        get_color="color",
-        get_radius="radius",
-        pickable=True
-    )
-
-    # Combined all of it and render a viewport
-    r = pdk.Deck(
-        map_style="mapbox://styles/mapbox/light-v9",
-        initial_view_state=view_state,
-        layers=[center_layer],
-        tooltip={"text": "Delivery Zone Center"},
-    )
-    
-    return r
-
 # New function to generate traffic analysis
 def get_traffic_analysis(city):
     """Generate a traffic analysis chart based on time of day"""
-    # Generate time points for a full day
-    hours = list(range(24))
-    
-    # Define traffic patterns based on typical urban traffic
-    # Morning rush (7-10), lunch (12-14), evening rush (16-19)
-    traffic_base = [
-        0.2, 0.1, 0.1, 0.1, 0.2, 0.4, 0.6, 0.9, 1.0, 0.8,  # 0-9
-        0.6, 0.5, 0.7, 0.7, 0.5, 0.6, 0.8, 1.0, 0.9, 0.7,  # 10-19
-        0.5, 0.4, 0.3, 0.2                                 # 20-23
-    ]
-    
-    # Add some randomness
-    random.seed(int(datetime.now().timestamp()) % 100)
-    traffic = [max(0, min(1, t + (random.random() - 0.5) * 0.2)) for t in traffic_base]
-    
-    # Get current hour
-    current_hour = datetime.now().hour
-    
-    # Create data frame
-    data = pd.DataFrame({
-        'Hour': hours,
-        'Traffic': traffic,
-        'TimeOfDay': [f"{h:02d}:00" for h in hours],
-        'Current': [h == current_hour for h in hours]
-    })
-    
-    # Create chart using Altair
-    chart = alt.Chart(data).mark_line(
-        color='blue',
-        strokeWidth=3
-    ).encode(
-        x=alt.X('Hour:Q', axis=alt.Axis(title='Hour of Day', labelAngle=0, values=list(range(0, 24, 2)))),
-        y=alt.Y('Traffic:Q', axis=alt.Axis(title='Traffic Intensity', format='%', domain=[0, 1])),
-        tooltip=['TimeOfDay', 'Traffic']
-    )
-    
-    # Add points
-    points = alt.Chart(data).mark_circle(
-        color='blue',
-        size=100
-    ).encode(
-        x='Hour:Q',
-        y='Traffic:Q',
-        tooltip=['TimeOfDay', 'Traffic']
-    )
-    
-    # Highlight current hour
-    current_point = alt.Chart(data[data['Current']]).mark_circle(
-        color='red',
-        size=150
-    ).encode(
-        x='Hour:Q',
-        y='Traffic:Q',
-        tooltip=['TimeOfDay', alt.Tooltip('Traffic', title='Current Traffic')]
-    )
-    
-    # Combine charts
-    combined_chart = (chart + points + current_point).properties(
-        title=f'Traffic Pattern Analysis for {city}',
-        width=600,
-        height=300
-    ).configure_title(
-        fontSize=20
-    )
+    # The chart spec and its data are built once per city and day; only the
+    # current-hour highlight changes between reruns
+    chart_spec = traffic_chart.traffic_chart_spec(city)
+    data = traffic_chart.traffic_frame(city)
     
-    return combined_chart, data
+    return chart_spec, data
 
 # Helper function to securely retrieve API keys
 def get_api_keys():
@@ -418,7 +146,7 @@ def main():
             "lon": 2.1734
         }
         news_success = True
-        news_data = get_simulated_news(city)
+        news_data = simulated_news(city)
     else:
         # Use real API data
         weather_success, weather_data = get_weather(city, weather_key)
@@ -489,10 +217,10 @@ def main():
     st.markdown('<div class="section-header">🚦 Traffic Analysis</div>', unsafe_allow_html=True)
     
     try:
-        traffic_chart, traffic_data = get_traffic_analysis(city)
+        traffic_spec, traffic_data = get_traffic_analysis(city)
         
         # Display chart
-        st.altair_chart(traffic_chart, use_container_width=True)
+        st.vega_lite_chart(traffic_spec, use_container_width=True)
         
         # Get current traffic level
         current_hour = datetime.now().hour
@@ -582,10 +310,10 @@ def main():
             }
         }
         
-        if st.button("Save Briefing to JSON"):
-            with open("last_briefing.json", "w") as f:
-                json.dump(briefing_data, f, indent=2)
-            st.success("Briefing data saved to 'last_briefing.json'")
+        if st.button("Save Briefing"):
+            # Appended to the briefing history in the background
+            briefing_store.append(briefing_data)
+            st.success(f"Briefing for {city} saved to history")
     except Exception as e:
         st.error(f"Error saving data: {str(e)}")
 
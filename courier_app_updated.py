@@ -1,11 +1,23 @@
 import streamlit as st
 import requests
+import provider_client
+import shared_cache
+import news_cache
+import geocode_store
+import poi_index
+import route_corridor
+import map_cache
 from datetime import datetime
 import pytz
 import time
-import folium
-from streamlit_folium import folium_static
-import pandas as pd
+import lazy_imports
+from briefing_engine import run_sources
+from route_optimizer import optimize_route
+from geometry import simplify
+
+# Heavy libraries load when the section that needs them first renders
+folium = lazy_imports.lazy("folium")
+pd = lazy_imports.lazy("pandas")
 
 # Set page config for a cleaner appearance
 st.set_page_config(
@@ -57,17 +69,24 @@ with tab1:
     )
     
     # Function to geocode addresses using TomTom Search API
-    def geocode_address(address):
+    def fetch_geocode(address):
         url = f"https://api.tomtom.com/search/2/geocode/{address}.json?key={TOMTOM_API_KEY}"
+        response = provider_client.get(url)
+        # Errors (bad key, rate limit, ...) raise so they are never cached as "not found"
+        response.raise_for_status()
+        data = response.json()
+        if data.get("results") and len(data["results"]) > 0:
+            # Extract coordinates from the first result
+            position = data["results"][0]["position"]
+            return position["lat"], position["lon"]
+        return None
+
+    def geocode_address(address):
         try:
-            response = requests.get(url)
-            data = response.json()
-            
-            if response.status_code == 200 and data.get("results") and len(data["results"]) > 0:
-                # Extract coordinates from the first result
-                result = data["results"][0]
-                position = result["position"]
-                return position["lat"], position["lon"]
+            # Repeated addresses are served from the on-disk geocode store
+            point = geocode_store.geocode(address, "tomtom", lambda: fetch_geocode(address))
+            if point is not None:
+                return point
             else:
                 st.error(f"Could not geocode address: {address}")
                 # Default to central Barcelona
@@ -76,6 +95,13 @@ with tab1:
             st.error(f"Error geocoding address: {str(e)}")
             return 41.3851, 2.1734
     
+    # Raw TomTom route with live traffic, shared by all sessions for the route TTL
+    @shared_cache.cached("route", cache_if=lambda result: result[0] == 200)
+    def fetch_route(start_lat, start_lon, end_lat, end_lon, vehicle):
+        url = f"https://api.tomtom.com/routing/1/calculateRoute/{start_lat},{start_lon}:{end_lat},{end_lon}/json?key={TOMTOM_API_KEY}&traffic=true&vehicleHeading=90&vehicle={vehicle}"
+        response = provider_client.get(url)
+        return response.status_code, response.json()
+    
     # Function to get route and traffic data using TomTom Routing API
     def get_route_with_traffic(start_lat, start_lon, end_lat, end_lon, vehicle_type):
         # Map vehicle type to TomTom API vehicle parameter
@@ -87,12 +113,10 @@ with tab1:
         }
         vehicle = vehicle_map.get(vehicle_type, "car")
         
-        url = f"https://api.tomtom.com/routing/1/calculateRoute/{start_lat},{start_lon}:{end_lat},{end_lon}/json?key={TOMTOM_API_KEY}&traffic=true&vehicleHeading=90&vehicle={vehicle}"
         try:
-            response = requests.get(url)
-            data = response.json()
+            status_code, data = fetch_route(start_lat, start_lon, end_lat, end_lon, vehicle)
             
-            if response.status_code == 200 and data.get("routes") and len(data["routes"]) > 0:
+            if status_code == 200 and data.get("routes") and len(data["routes"]) > 0:
                 route_data = data["routes"][0]
                 summary = route_data["summary"]
                 
@@ -167,19 +191,34 @@ with tab1:
                 ]
             }, []
     
+    # TomTom Search API call for one circle of POIs
+    def fetch_pois(category, query, lat, lon, radius):
+        url = f"https://api.tomtom.com/search/2/poiSearch/{query}.json?key={TOMTOM_API_KEY}&lat={lat}&lon={lon}&radius={radius}&categorySet={category}&limit={poi_index.FETCH_LIMIT}"
+        response = provider_client.get(url)
+        response.raise_for_status()
+        return response.json().get("results", [])
+    
+    # POI search through the shared local index; cold areas fall back to TomTom Search API
+    def search_pois(category, query, lat, lon, radius):
+        fetch = lambda: fetch_pois(category, query, lat, lon, radius)
+        return poi_index.get_index().query_radius(category, lat, lon, radius, fetch=fetch)
+    
     # Function to find resources (fuel/charging) using TomTom Search API with categories
-    def find_resources(center_lat, center_lon, resource_type, radius=5000):
+    def find_resources(center_lat, center_lon, resource_type, radius=5000, route_points=None):
         # Map resource type to TomTom category ID
         category = "7311" if resource_type == "fuel" else "7309"  # 7311 for petrol stations, 7309 for EV charging
         
-        url = f"https://api.tomtom.com/search/2/poiSearch/{resource_type}.json?key={TOMTOM_API_KEY}&lat={center_lat}&lon={center_lon}&radius={radius}&categorySet={category}"
         try:
-            response = requests.get(url)
-            data = response.json()
+            if route_points and len(route_points) > 1:
+                # Search a corridor along the route polyline, ranked by detour
+                fetch = lambda lat, lon, r: fetch_pois(category, resource_type, lat, lon, r)
+                results = route_corridor.corridor_search(poi_index.get_index(), category, route_points, fetch)
+            else:
+                results = search_pois(category, resource_type, center_lat, center_lon, radius)
             
             resources = []
-            if response.status_code == 200 and data.get("results"):
-                for result in data["results"][:5]:  # Limit to top 5 results
+            if results:
+                for result in results[:5]:  # Limit to top 5 results
                     poi = result["poi"]
                     address = result.get("address", {})
                     position = result["position"]
@@ -229,14 +268,12 @@ with tab1:
     
     # Function to find parking using TomTom Search API
     def find_parking(destination_lat, destination_lon, radius=1000):
-        url = f"https://api.tomtom.com/search/2/poiSearch/parking.json?key={TOMTOM_API_KEY}&lat={destination_lat}&lon={destination_lon}&radius={radius}&categorySet=7600"  # 7600 is the category code for parking
         try:
-            response = requests.get(url)
-            data = response.json()
+            results = search_pois("7600", "parking", destination_lat, destination_lon, radius)  # 7600 is the category code for parking
             
             parking = []
-            if response.status_code == 200 and data.get("results"):
-                for result in data["results"][:5]:  # Limit to top 5 results
+            if results:
+                for result in results[:5]:  # Limit to top 5 results
                     poi = result["poi"]
                     position = result["position"]
                     
@@ -274,28 +311,39 @@ with tab1:
             # Get route data and traffic incidents in one call
             route_data, traffic_incidents = get_route_with_traffic(start_lat, start_lon, end_lat, end_lon, vehicle_type)
             
-            # Create a map
-            m = folium.Map(location=[(start_lat + end_lat)/2, (start_lon + end_lon)/2], zoom_start=12)
+            # Build the map only when its content changed; identical requests reuse the cached HTML
+            map_key = map_cache.content_key(
+                start=[start_lat, start_lon, current_location],
+                end=[end_lat, end_lon, destination],
+                points=route_data["points"],
+                incidents=traffic_incidents,
+            )
             
-            # Add markers for start and end
-            folium.Marker([start_lat, start_lon], popup=current_location, icon=folium.Icon(color="green")).add_to(m)
-            folium.Marker([end_lat, end_lon], popup=destination, icon=folium.Icon(color="red")).add_to(m)
+            def build_map():
+                # Create a map
+                m = folium.Map(location=[(start_lat + end_lat)/2, (start_lon + end_lon)/2], zoom_start=12)
             
-            # Add the route line
-            folium.PolyLine(route_data["points"], color="blue", weight=5, opacity=0.7).add_to(m)
+                # Add markers for start and end
+                folium.Marker([start_lat, start_lon], popup=current_location, icon=folium.Icon(color="green")).add_to(m)
+                folium.Marker([end_lat, end_lon], popup=destination, icon=folium.Icon(color="red")).add_to(m)
             
-            # Add traffic incidents
-            for incident in traffic_incidents:
-                icon_color = "red" if incident["type"] == "ACCIDENT" else "orange"
-                folium.Marker(
-                    incident["coordinates"], 
-                    popup=f"{incident['type']}: {incident['description']} - Delay: {incident['delay']}", 
-                    icon=folium.Icon(color=icon_color, icon="warning-sign")
-                ).add_to(m)
+                # Add the route line, simplified for the map zoom (route_data keeps the full geometry)
+                folium.PolyLine(simplify(route_data["points"], zoom=12), color="blue", weight=5, opacity=0.7).add_to(m)
+            
+                # Add traffic incidents
+                for incident in traffic_incidents:
+                    icon_color = "red" if incident["type"] == "ACCIDENT" else "orange"
+                    folium.Marker(
+                        incident["coordinates"], 
+                        popup=f"{incident['type']}: {incident['description']} - Delay: {incident['delay']}", 
+                        icon=folium.Icon(color=icon_color, icon="warning-sign")
+                    ).add_to(m)
+            
+                return m
             
             # Display the map
             st.subheader("Route Map")
-            folium_static(m)
+            st.components.v1.html(map_cache.cached_map_html(map_key, build_map), height=510, width=700)
             
             # Display route summary with ETA
             st.subheader("Route Summary")
@@ -324,18 +372,18 @@ with tab1:
             
             # Find resources based on vehicle type
             st.subheader("Nearby Resources")
-            # Use the midpoint of the route to find resources
+            # Search along the route itself; the midpoint is only used if the route has no geometry
             mid_point_lat = (start_lat + end_lat) / 2
             mid_point_lon = (start_lon + end_lon) / 2
             
             if vehicle_type == "Electric Vehicle":
-                resources = find_resources(mid_point_lat, mid_point_lon, "charging")
+                resources = find_resources(mid_point_lat, mid_point_lon, "charging", route_points=route_data["points"])
                 if resources:
                     st.write("🔌 EV Charging Stations along your route:")
                     for resource in resources:
                         st.write(f"- {resource['name']} ({resource['power']}) - {resource['distance']} - Available: {resource['available']}")
             else:
-                resources = find_resources(mid_point_lat, mid_point_lon, "fuel")
+                resources = find_resources(mid_point_lat, mid_point_lon, "fuel", route_points=route_data["points"])
                 if resources:
                     st.write("⛽ Fuel Stations along your route:")
                     for resource in resources:
@@ -347,6 +395,35 @@ with tab1:
             for option in parking_options:
                 st.write(f"- {option['name']} - Available: {option['available']} - Cost: {option['cost']}")
 
+    # Multi-stop planning: sequence a full day of stops from the current location (depot)
+    st.subheader("Daily Manifest")
+    manifest_text = st.text_area("Delivery stops (one address per line):", "", key="manifest_stops")
+    vehicle_capacity = st.number_input("Vehicle capacity (parcels per trip, 0 = unlimited):", min_value=0, value=0, step=1)
+
+    if st.button("Optimize Stop Order", key="optimize_stops_btn"):
+        stop_addresses = [line.strip() for line in manifest_text.splitlines() if line.strip()]
+        if not stop_addresses:
+            st.warning("Enter at least one delivery stop.")
+        else:
+            with st.spinner(f"Sequencing {len(stop_addresses)} stops..."):
+                depot_lat, depot_lon = geocode_address(current_location)
+                stops = []
+                for address in stop_addresses:
+                    stop_lat, stop_lon = geocode_address(address)
+                    stops.append({"name": address, "lat": stop_lat, "lon": stop_lon})
+
+                plan = optimize_route((depot_lat, depot_lon), stops, capacity=vehicle_capacity or None)
+
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    st.metric("Stops", len(stops))
+                with col2:
+                    st.metric("Total distance", f"{plan['distance_km']} km")
+                with col3:
+                    st.metric("Trips from depot", len(plan["trips"]))
+
+                st.dataframe(pd.DataFrame(plan["legs"]), use_container_width=True)
+
 with tab2:
     st.header("Zone Information")
     
@@ -381,12 +458,13 @@ with tab2:
         local_tz = pytz.timezone(tz_name)
         return datetime.now(local_tz).strftime("%H:%M")
     
+    @shared_cache.cached("weather", cache_if=lambda result: result[0])
     def get_weather(city):
         api_key = OPENWEATHER_API_KEY.strip()
         url = f"https://api.openweathermap.org/data/2.5/weather?q={city}&appid={api_key}&units=metric"
         try:
             for attempt in range(2):
-                response = requests.get(url, timeout=10)
+                response = provider_client.get(url, timeout=10)
                 if response.status_code == 200:
                     data = response.json()
                     weather = data["weather"][0]["description"].capitalize()
@@ -402,31 +480,15 @@ with tab2:
             return False, (f"Network error while fetching weather data: {str(e)}", None)
     
     def get_news(country_code, city):
-        api_key = NEWS_API_KEY.strip()
-        url = f"https://newsapi.org/v2/top-headlines?country={country_code}&q={city}&apiKey={api_key}"
         try:
-            response = requests.get(url, timeout=10)
-            if response.status_code == 200:
-                data = response.json()
-                articles = data.get("articles", [])
-                if not articles:
-                    fallback_url = f"https://newsapi.org/v2/top-headlines?country={country_code}&category=general&apiKey={api_key}"
-                    response = requests.get(fallback_url, timeout=10)
-                    if response.status_code == 200:
-                        data = response.json()
-                        articles = data.get("articles", [])
-                relevant_keywords = ["traffic", "road", "accident", "protest", "event", "closure", "strike", "demonstration"]
-                filtered_articles = [
-                    article for article in articles[:10]
-                    if any(keyword in article.get("title", "").lower() for keyword in relevant_keywords)
-                ]
-                display_articles = filtered_articles[:3] if filtered_articles else articles[:3]
-                headlines = [article.get("title") for article in display_articles]
-                return True, headlines if headlines else ["No significant news affecting deliveries at this time"]
-            elif response.status_code == 401:
+            articles, filtered_articles = news_cache.get_headlines(country_code, city, NEWS_API_KEY)
+            display_articles = filtered_articles[:3] if filtered_articles else articles[:3]
+            headlines = [article.get("title") for article in display_articles]
+            return True, headlines if headlines else ["No significant news affecting deliveries at this time"]
+        except news_cache.NewsAPIError as e:
+            if e.status_code == 401:
                 return False, ["API key error. Please check your NewsAPI key."]
-            else:
-                return False, [f"News API error (Status: {response.status_code})"]
+            return False, [f"News API error (Status: {e.status_code})"]
         except requests.exceptions.RequestException as e:
             return False, [f"Network error while fetching news data: {str(e)}"]
     
@@ -460,9 +522,22 @@ with tab2:
     
     if st.button("Generate Zone Briefing", key="generate_zone_btn"):
         with st.spinner("Generating briefing..."):
-            weather_success, (weather_data, temp_val) = get_weather(zone_location)
-            news_success, news_data = get_news(country, zone_location)
-            load_level, load_details = estimate_delivery_load(zone_location)
+            # Fetch all sources at once; the slowest one sets the briefing latency
+            results = run_sources(
+                {
+                    "weather": lambda: get_weather(zone_location),
+                    "news": lambda: get_news(country, zone_location),
+                    "load": lambda: estimate_delivery_load(zone_location),
+                },
+                fallbacks={
+                    "weather": (False, ("Weather data unavailable. Please try again.", None)),
+                    "news": (False, ["News data unavailable. Please try again."]),
+                    "load": ("Unknown", "Delivery load estimate unavailable"),
+                },
+            )
+            weather_success, (weather_data, temp_val) = results["weather"]
+            news_success, news_data = results["news"]
+            load_level, load_details = results["load"]
     
             st.subheader(f"Zone: {zone_location.title()}")
             col1, col2, col3 = st.columns(3)
@@ -520,13 +595,10 @@ with tab3:
             category = category_map.get(resource_type, "7311")
             radius_meters = radius_km * 1000
             
-            # Call TomTom POI API
-            url = f"https://api.tomtom.com/search/2/poiSearch/{resource_type}.json?key={TOMTOM_API_KEY}&lat={lat}&lon={lon}&radius={radius_meters}&categorySet={category}"
-            response = requests.get(url)
-            data = response.json()
+            # Served from the local POI index; TomTom is only called for areas not fetched yet
+            results = search_pois(category, resource_type, lat, lon, radius_meters)
             
-            if response.status_code == 200 and data.get("results"):
-                results = data["results"]
+            if results:
                 resource_locations = []
                 resource_data = {"Name": [], "Distance": [], "Address": []}
                 
@@ -573,7 +645,7 @@ with tab3:
                 
                 return resource_data, resource_locations, lat, lon
             else:
-                st.error(f"Error finding {resource_type}: {data.get('detailedError', {}).get('message', 'No results found')}")
+                st.error(f"Error finding {resource_type}: No results found")
                 return None, None, lat, lon
         
         except Exception as e:
@@ -1,9 +1,8 @@
 
 import streamlit as st
-import requests
+from logistics_core import headlines, weather_summary
 from datetime import datetime
 import pytz
-import time
 
 # Set page config
 st.set_page_config(
@@ -64,53 +63,10 @@ def get_local_time(city):
     return datetime.now(local_tz).strftime("%H:%M")
 
 def get_weather(city):
-    api_key = OPENWEATHER_API_KEY.strip()
-    url = f"https://api.openweathermap.org/data/2.5/weather?q={city}&appid={api_key}&units=metric"
-    try:
-        for attempt in range(2):
-            response = requests.get(url, timeout=10)
-            if response.status_code == 200:
-                data = response.json()
-                weather = data["weather"][0]["description"].capitalize()
-                temp = data["main"]["temp"]
-                return True, (f"{temp}°C, {weather}", temp)
-            elif response.status_code == 401:
-                return False, ("API key error. Please check your OpenWeatherMap API key.", None)
-            elif response.status_code == 404:
-                return False, (f"City '{city}' not found. Please check spelling.", None)
-            time.sleep(1)
-        return False, (f"Weather API error (Status: {response.status_code})", None)
-    except requests.exceptions.RequestException as e:
-        return False, (f"Network error while fetching weather data: {str(e)}", None)
+    return weather_summary(city, OPENWEATHER_API_KEY)
 
 def get_news(country_code, city):
-    api_key = NEWS_API_KEY.strip()
-    url = f"https://newsapi.org/v2/top-headlines?country={country_code}&q={city}&apiKey={api_key}"
-    try:
-        response = requests.get(url, timeout=10)
-        if response.status_code == 200:
-            data = response.json()
-            articles = data.get("articles", [])
-            if not articles:
-                fallback_url = f"https://newsapi.org/v2/top-headlines?country={country_code}&category=general&apiKey={api_key}"
-                response = requests.get(fallback_url, timeout=10)
-                if response.status_code == 200:
-                    data = response.json()
-                    articles = data.get("articles", [])
-            relevant_keywords = ["traffic", "road", "accident", "protest", "event", "closure", "strike", "demonstration"]
-            filtered_articles = [
-                article for article in articles[:10]
-                if any(keyword in article.get("title", "").lower() for keyword in relevant_keywords)
-            ]
-            display_articles = filtered_articles[:3] if filtered_articles else articles[:3]
-            headlines = [article.get("title") for article in display_articles]
-            return True, headlines if headlines else ["No significant news affecting deliveries at this time"]
-        elif response.status_code == 401:
-            return False, ["API key error. Please check your NewsAPI key."]
-        else:
-            return False, [f"News API error (Status: {response.status_code})"]
-    except requests.exceptions.RequestException as e:
-        return False, [f"Network error while fetching news data: {str(e)}"]
+    return headlines(country_code, city, NEWS_API_KEY)
 
 def estimate_delivery_load(location):
     now = datetime.now().hour
@@ -3,93 +3,32 @@ def generate_traffic_data(city):
     # Hours of the day (24-hour format)
     hours = list(range(24))
     
-    # Traffic patterns vary by city type
-    # These are simulated patterns
-    big_cities = ["Barcelona", "Madrid", "Valencia", "Bilbao", "Sevilla"]
-    medium_cities = ["Zaragoza", "Málaga", "Murcia", "Mallorca", "Alicante"]
-    
-    # Base traffic patterns
-    if city.lower() in [c.lower() for c in big_cities]:
-        # Big city traffic pattern
-        morning_peak = [0.3, 0.4, 0.5, 0.7, 1.0, 1.5, 1.8, 2.0, 1.7]  # 0-8 AM
-        day_traffic = [1.5, 1.3, 1.4, 1.6, 1.5, 1.4, 1.3, 1.5]  # 9AM-4PM
-        evening_peak = [1.7, 1.9, 1.8, 1.5, 1.3, 1.0, 0.7]  # 5PM-11PM
-    elif city.lower() in [c.lower() for c in medium_cities]:
-        # Medium city traffic pattern
-        morning_peak = [0.2, 0.3, 0.4, 0.6, 0.9, 1.3, 1.6, 1.8, 1.5]  # 0-8 AM
-        day_traffic = [1.3, 1.1, 1.2, 1.4, 1.3, 1.2, 1.1, 1.3]  # 9AM-4PM
-        evening_peak = [1.5, 1.7, 1.6, 1.3, 1.1, 0.8, 0.5]  # 5PM-11PM
-    else:
-        # Small city/default traffic pattern
-        morning_peak = [0.1, 0.2, 0.3, 0.5, 0.7, 1.0, 1.2, 1.3, 1.1]  # 0-8 AM
-        day_traffic = [1.0, 0.9, 1.0, 1.1, 1.0, 0.9, 0.8, 1.0]  # 9AM-4PM
-        evening_peak = [1.2, 1.4, 1.3, 1.1, 0.9, 0.6, 0.3]  # 5PM-11PM
-    
-    # Combine patterns for full day
-    traffic_levels = morning_peak + day_traffic + evening_peak
-    
-    # Add some randomness to simulate daily variations
-    random_factor = np.random.normal(1, 0.1, 24)
-    traffic_levels = [level * factor for level, factor in zip(traffic_levels, random_factor)]
-    
-    # Scale to 0-10 range for better visualization
-    max_level = max(traffic_levels)
-    traffic_levels = [round(level / max_level * 10, 1) for level in traffic_levels]
+    # Base pattern by city size plus a daily variation (seeded per city and date),
+    # scaled to 0-10; optimal delivery windows are the runs of hours below 5
+    random_factor = 1 + 0.1 * traffic_sim.normal(city)[np.newaxis, :]
+    traffic_levels, windows = traffic_profile.batch_windows([city], noise=random_factor)
     
     # Create the dataframe
     traffic_df = pd.DataFrame({
         'Hour': hours,
-        'TrafficLevel': traffic_levels
+        'TrafficLevel': traffic_levels[0]
     })
     
-    # Determine optimal delivery windows (traffic level below 5)
-    optimal_hours = traffic_df[traffic_df['TrafficLevel'] < 5]
-    
-    if len(optimal_hours) == 0:
-        # If no hours below 5, take the lowest 25% of traffic hours
-        threshold = traffic_df['TrafficLevel'].quantile(0.25)
-        optimal_hours = traffic_df[traffic_df['TrafficLevel'] <= threshold]
-    
-    # Format optimal times as readable ranges
-    optimal_ranges = []
-    
-    if not optimal_hours.empty:
-        start_hour = optimal_hours.iloc[0]['Hour']
-        current_range = [start_hour]
-        
-        for i in range(1, len(optimal_hours)):
-            if optimal_hours.iloc[i]['Hour'] == optimal_hours.iloc[i-1]['Hour'] + 1:
-                # Continue the current range
-                current_range.append(optimal_hours.iloc[i]['Hour'])
-            else:
-                # End the current range and start a new one
-                optimal_ranges.append(current_range)
-                current_range = [optimal_hours.iloc[i]['Hour']]
-        
-        # Add the last range
-        optimal_ranges.append(current_range)
-    
-    # Format ranges as strings
-    formatted_ranges = []
-    for time_range in optimal_ranges:
-        if len(time_range) == 1:
-            formatted_ranges.append(f"{time_range[0]}:00")
-        else:
-            formatted_ranges.append(f"{time_range[0]}:00-{time_range[-1]}:00")
-    
-    return traffic_df, formatted_ranges
+    return traffic_df, windows[0]
 
 import streamlit as st
-import requests
+import briefing_store
+from logistics_core import find_gas_stations, generate_map, get_safety_tips
+from logistics_core.ui import get_news, get_weather
 from datetime import datetime, time
-import json
 import pandas as pd
-import pydeck as pdk
 import time as tm
 import os
 
 
 import numpy as np
+import traffic_profile
+import traffic_sim
 
 # Load environment variables from .env file if it exists
 
@@ -138,184 +77,6 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Functions from original script
-def get_weather(city, api_key):
-    """Get weather information for a city"""
-    with st.spinner(f"Fetching weather data for {city}..."):
-        api_key = api_key.strip()
-        url = f"https://api.openweathermap.org/data/2.5/weather?q={city}&appid={api_key}&units=metric"
-        
-        try:
-            response = requests.get(url, timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                weather = data["weather"][0]["description"].capitalize()
-                temp = data["main"]["temp"]
-                icon = data["weather"][0]["icon"]
-                humidity = data["main"]["humidity"]
-                wind_speed = data["wind"]["speed"]
-                
-                # Get coordinates for map
-                lat = data["coord"]["lat"]
-                lon = data["coord"]["lon"]
-                
-                weather_details = {
-                    "description": weather,
-                    "temp": temp,
-                    "icon": icon,
-                    "humidity": humidity,
-                    "wind_speed": wind_speed,
-                    "lat": lat,
-                    "lon": lon
-                }
-                
-                return True, weather_details
-            elif response.status_code == 401:
-                return False, "API key error. Please check your OpenWeatherMap API key."
-            elif response.status_code == 404:
-                return False, f"City '{city}' not found. Please check spelling."
-            
-            return False, f"Weather API error (Status: {response.status_code})"
-        
-        except requests.exceptions.RequestException as e:
-            return False, f"Network error while fetching weather data: {str(e)}"
-
-def get_news(country_code, city, api_key):
-    """Get news headlines for a location"""
-    with st.spinner(f"Fetching local news for {city}, {country_code.upper()}..."):
-        api_key = api_key.strip()
-        url = f"https://newsapi.org/v2/top-headlines?country={country_code}&q={city}&apiKey={api_key}"
-        
-        try:
-            response = requests.get(url, timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                articles = data.get("articles", [])
-                
-                if not articles:
-                    # Fallback to general news
-                    url = f"https://newsapi.org/v2/top-headlines?country={country_code}&category=general&apiKey={api_key}"
-                    response = requests.get(url, timeout=10)
-                    
-                    if response.status_code == 200:
-                        data = response.json()
-                        articles = data.get("articles", [])
-                
-                relevant_articles = []
-                for article in articles[:10]:
-                    title = article.get("title", "").lower() if article.get("title") else ""
-                    if any(keyword in title for keyword in ["traffic", "road", "accident", "protest", "closure"]):
-                        relevant_articles.append(article)
-                
-                display_articles = relevant_articles[:5] if relevant_articles else articles[:5]
-                
-                if display_articles:
-                    news_items = []
-                    for article in display_articles:
-                        news_items.append({
-                            "title": article.get("title", "No title available"),
-                            "url": article.get("url", "#"),
-                            "source": article.get("source", {}).get("name", "Unknown") if article.get("source") else "Unknown"
-                        })
-                    return True, news_items
-                else:
-                    return True, [{"title": "No significant news affecting deliveries at this time", "url": "#", "source": "System"}]
-            
-            elif response.status_code == 401:
-                return False, [{"title": "API key error. Please check your NewsAPI key.", "url": "#", "source": "Error"}]
-            elif response.status_code == 429:
-                return False, [{"title": "Too many requests. API rate limit exceeded.", "url": "#", "source": "Error"}]
-            else:
-                # Fallback for any other error
-                return False, [{"title": f"Error fetching news (Status: {response.status_code})", "url": "#", "source": "Error"}]
-        
-        except Exception as e:
-            return False, [{"title": f"Error fetching news: {str(e)}", "url": "#", "source": "Error"}]
-
-def find_gas_stations(lat, lon):
-    """Find gas stations near the specified location"""
-    now = datetime.now().hour
-    
-    # Simple time-based patterns
-    if 7 <= now <= 10:  # Morning commute
-        return "High", f"5+ gas stations open within 3km radius", "🟢"
-    elif 17 <= now <= 20:  # Evening commute
-        return "Medium", f"3-4 gas stations open within 3km radius", "🟡"
-    elif 22 <= now <= 6:  # Late night
-        return "Low", f"Limited gas stations open for 24h service", "🔴"
-    else:
-        return "Medium", "Normal gas station operations in your area", "🟡"
-
-def get_safety_tips(weather_data):
-    """Generate safety tips based on weather conditions"""
-    if not isinstance(weather_data, dict):
-        return ["No specific weather-related safety concerns. Proceed normally."]
-    
-    tips = []
-    temp = weather_data.get("temp", 20)
-    description = weather_data.get("description", "").lower()
-    
-    if "rain" in description or "shower" in description:
-        tips.append("Roads may be slippery. Maintain safe distance and reduce speed.")
-    elif "snow" in description:
-        tips.append("Snow conditions reported. Use winter equipment and drive cautiously.")
-    elif "fog" in description:
-        tips.append("Reduced visibility. Use fog lights and reduce speed.")
-    elif "storm" in description or "thunder" in description:
-        tips.append("Stormy conditions. Seek shelter if lightning intensifies.")
-    
-    if temp >= 30:
-        tips.append("High temperature. Stay hydrated and avoid prolonged sun exposure.")
-    elif temp <= 5:
-        tips.append("Cold temperature. Wear appropriate clothing and watch for ice.")
-        
-    if not tips:
-        tips.append("No specific weather-related safety concerns. Proceed normally.")
-        
-    return tips
-
-def generate_map(lat, lon, zoom=12):
-    """Generate an interactive 3D map for the location"""
-    # Create a layer for the map
-    layer = pdk.Layer(
-        "HexagonLayer",
-        data=pd.DataFrame({
-            "lat": [lat],
-            "lon": [lon]
-        }),
-        get_position=["lon", "lat"],
-        auto_highlight=True,
-        elevation_scale=50,
-        pickable=True,
-        elevation_range=[0, 300],
-        extruded=True,
-        coverage=1,
-        radius=1000,
-    )
-
-    # Set the viewport location
-    view_state = pdk.ViewState(
-        longitude=lon,
-        latitude=lat,
-        zoom=zoom,
-        min_zoom=5,
-        max_zoom=15,
-        pitch=40.5,
-        bearing=-27.36
-    )
-
-    # Combined all of it and render a viewport
-    r = pdk.Deck(
-        map_style="mapbox://styles/mapbox/light-v9",
-        layers=[layer],
-        initial_view_state=view_state,
-        tooltip={"text": "Delivery Zone Center"},
-    )
-    
-    return r
-
 # Helper function to securely retrieve API keys
 def get_api_keys():
     # Get API keys from environment variables first
@@ -378,7 +139,7 @@ def main():
     
     # Generate data
     weather_success, weather_data = get_weather(city, weather_key)
-    news_success, news_data = get_news(country, city, news_key)
+    news_success, news_data = get_news(country, city, news_key, simulate_on_error=False)
     
     # Generate traffic data
     traffic_df, optimal_delivery_times = generate_traffic_data(city)
@@ -402,7 +163,7 @@ def main():
         
         if weather_success and isinstance(weather_data, dict):
             # Display interactive 3D map
-            map_deck = generate_map(weather_data["lat"], weather_data["lon"])
+            map_deck = generate_map(weather_data["lat"], weather_data["lon"], marker="hexagon")
             st.pydeck_chart(map_deck)
             
             # Display coordinates below map
@@ -592,10 +353,10 @@ def main():
             }
         }
         
-        if st.button("Save Briefing to JSON"):
-            with open("last_briefing.json", "w") as f:
-                json.dump(briefing_data, f, indent=2)
-            st.success("Briefing data saved to 'last_briefing.json'")
+        if st.button("Save Briefing"):
+            # Appended to the briefing history in the background
+            briefing_store.append(briefing_data)
+            st.success(f"Briefing for {city} saved to history")
     except Exception as e:
         st.error(f"Error saving data: {str(e)}")
 
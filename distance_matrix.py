@@ -0,0 +1,98 @@
+"""Vectorized distance matrices between sets of (lat, lon) points.
+
+One `geopy.distance.distance(...)` call per pair is fine for a start/end
+route, but clustering, assignment and routing compare every stop with every
+other stop. This module computes whole N x M matrices with NumPy:
+
+- "haversine": great-circle distance, accurate to ~0.5% anywhere,
+- "equirectangular": flat-earth approximation, a bit faster and well within
+  1% at city scale,
+- "geodesic": geopy's ellipsoidal distance, exact but one Python call per
+  pair, so only meant for short lists.
+
+Large matrices are filled block by block so the temporaries stay bounded,
+and `dtype=np.float32` halves the memory of the result.
+"""
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Rows of the output computed at once; temporaries are ~6 arrays of BLOCK_ROWS x M
+BLOCK_ROWS = 1024
+
+# Above this many pairs the geodesic mode refuses to run (it is pure Python)
+GEODESIC_MAX_PAIRS = 250_000
+
+
+def _as_radians(points, dtype):
+    pts = np.asarray(points, dtype=dtype).reshape(-1, 2)
+    return np.radians(pts[:, 0]), np.radians(pts[:, 1])
+
+
+def _haversine_block(lat1, lon1, lat2, lon2, cos_lat2):
+    a = np.sin((lat1[:, None] - lat2) / 2) ** 2 + np.cos(lat1)[:, None] * cos_lat2 * np.sin((lon1[:, None] - lon2) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def _equirectangular_block(lat1, lon1, lat2, lon2, cos_lat2):
+    x = (lon1[:, None] - lon2) * np.cos((lat1[:, None] + lat2) / 2)
+    y = lat1[:, None] - lat2
+    return EARTH_RADIUS_KM * np.sqrt(x * x + y * y)
+
+
+_BLOCK_FUNCS = {
+    "haversine": _haversine_block,
+    "equirectangular": _equirectangular_block,
+}
+
+
+def distance_matrix(origins, destinations=None, method="haversine", dtype=np.float64, block_rows=BLOCK_ROWS):
+    """Distances in km between every origin and every destination.
+
+    `origins` and `destinations` are sequences of (lat, lon) or N x 2 arrays;
+    with no destinations the matrix is origins x origins.
+    """
+    if destinations is None:
+        destinations = origins
+    if method == "geodesic":
+        return geodesic_matrix(origins, destinations).astype(dtype, copy=False)
+    if method not in _BLOCK_FUNCS:
+        raise ValueError(f"Unknown distance method: {method}")
+
+    block = _BLOCK_FUNCS[method]
+    lat1, lon1 = _as_radians(origins, dtype)
+    lat2, lon2 = _as_radians(destinations, dtype)
+    cos_lat2 = np.cos(lat2)
+    out = np.empty((lat1.size, lat2.size), dtype=dtype)
+    for start in range(0, lat1.size, block_rows):
+        stop = start + block_rows
+        out[start:stop] = block(lat1[start:stop], lon1[start:stop], lat2, lon2, cos_lat2)
+    return out
+
+
+def haversine_matrix(origins, destinations=None, dtype=np.float64):
+    return distance_matrix(origins, destinations, method="haversine", dtype=dtype)
+
+
+def equirectangular_matrix(origins, destinations=None, dtype=np.float64):
+    return distance_matrix(origins, destinations, method="equirectangular", dtype=dtype)
+
+
+def geodesic_matrix(origins, destinations=None):
+    """Exact ellipsoidal distances via geopy (one call per pair, short lists only)"""
+    from geopy.distance import geodesic
+
+    if destinations is None:
+        destinations = origins
+    origins = [tuple(p) for p in np.asarray(origins, dtype=float).reshape(-1, 2)]
+    destinations = [tuple(p) for p in np.asarray(destinations, dtype=float).reshape(-1, 2)]
+    if len(origins) * len(destinations) > GEODESIC_MAX_PAIRS:
+        raise ValueError("Too many pairs for geodesic mode; use haversine or equirectangular")
+    return np.array([[geodesic(a, b).km for b in destinations] for a in origins]).reshape(len(origins), len(destinations))
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """Element-wise great-circle distance in km (scalars or equal-shape arrays)"""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=float)) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
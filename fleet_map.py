@@ -0,0 +1,113 @@
+"""Fleet-scale pydeck layers for the dispatch map.
+
+generate_map draws one ScatterplotLayer point from a list of Python dicts,
+which is fine for a zone center but not for thousands of couriers and stops:
+every point becomes a JSON object with repeated keys and per-row color and
+radius values. fleet_layers takes columnar arrays instead (one array of
+latitudes, one of longitudes) and hands them to pydeck in one of two ways:
+
+- binary=True: positions go through pydeck's binary transport as float32
+  typed arrays (rendered by the pydeck Jupyter widget / deck.show()),
+- binary=False (Streamlit): each point is a bare [lon, lat] pair read with the
+  identity accessor "-", and color/radius are layer constants, so the JSON
+  payload is just the coordinates.
+
+Above HEXAGON_THRESHOLD stops the stop layer switches to a HexagonLayer, which
+aggregates on the client and stays responsive at 50k points. read_fleet turns
+the dispatch CSV courier_app_fixed accepts into generate_map's `fleet` dict.
+"""
+import numpy as np
+import pandas as pd
+import pydeck as pdk
+
+HEXAGON_THRESHOLD = 20_000
+# 5 decimals is ~1 m, plenty for a dispatch overview and keeps the JSON short
+COORD_DECIMALS = 5
+
+COURIER_COLOR = [30, 136, 229]
+STOP_COLOR = [244, 67, 54]
+ROUTE_COLOR = [76, 175, 80]
+
+
+def _positions(lats, lons, dtype=np.float64):
+    """Columnar lat/lon arrays -> N x 2 array of [lon, lat]"""
+    lats = np.asarray(lats, dtype=dtype)
+    lons = np.asarray(lons, dtype=dtype)
+    if lats.shape != lons.shape:
+        raise ValueError("lats and lons must have the same length")
+    return np.round(np.column_stack([lons, lats]), COORD_DECIMALS)
+
+
+def point_layer(layer_id, lats, lons, color, radius=30, binary=False):
+    """ScatterplotLayer for many points given as columnar arrays"""
+    style = dict(
+        get_fill_color=color,
+        radius_min_pixels=2,
+        radius_max_pixels=8,
+        pickable=False,  # picking thousands of points costs more than it helps here
+    )
+    if binary:
+        positions = _positions(lats, lons, dtype=np.float32)
+        data = pd.DataFrame({"position": list(positions)})
+        return pdk.Layer("ScatterplotLayer", data=data, id=layer_id, get_position="position",
+                         get_radius=radius, use_binary_transport=True, **style)
+    return pdk.Layer("ScatterplotLayer", data=_positions(lats, lons).tolist(), id=layer_id,
+                     get_position="-", get_radius=radius, **style)
+
+
+def hexagon_layer(layer_id, lats, lons, radius=200):
+    """Client-side aggregated density of many points"""
+    return pdk.Layer(
+        "HexagonLayer",
+        data=_positions(lats, lons).tolist(),
+        id=layer_id,
+        get_position="-",
+        radius=radius,
+        elevation_scale=4,
+        extruded=True,
+        coverage=0.9,
+    )
+
+
+def path_layer(layer_id, paths, color=ROUTE_COLOR, width=4):
+    """PathLayer from a list of routes, each an N x 2 array of (lat, lon)"""
+    data = [_positions(np.asarray(p)[:, 0], np.asarray(p)[:, 1]).tolist() for p in paths if len(p) > 1]
+    return pdk.Layer("PathLayer", data=data, id=layer_id, get_path="-", get_color=color,
+                     width_min_pixels=width, pickable=False)
+
+
+def read_fleet(source):
+    """generate_map(fleet=...) dict from a fleet CSV (path or file object)
+
+    Columns: kind ("courier" or "stop"), lat, lon and optionally active;
+    couriers whose active is false are left off the map.
+    """
+    frame = pd.read_csv(source)
+    kinds = frame["kind"].astype(str).str.strip().str.lower()
+    couriers = kinds == "courier"
+    if "active" in frame:
+        couriers &= frame["active"].astype(str).str.strip().str.lower().isin(["1", "true", "yes"])
+    stops = kinds == "stop"
+    return {
+        "couriers": (frame.loc[couriers, "lat"].to_numpy(float), frame.loc[couriers, "lon"].to_numpy(float)),
+        "stops": (frame.loc[stops, "lat"].to_numpy(float), frame.loc[stops, "lon"].to_numpy(float)),
+    }
+
+
+def fleet_layers(couriers=None, stops=None, routes=None, binary=False):
+    """Layers for a dispatch map.
+
+    `couriers` and `stops` are (lats, lons) pairs of arrays; `routes` is a list
+    of polylines. Stops switch to a HexagonLayer above HEXAGON_THRESHOLD.
+    """
+    layers = []
+    if routes:
+        layers.append(path_layer("fleet-routes", routes))
+    if stops is not None and len(stops[0]):
+        if len(stops[0]) > HEXAGON_THRESHOLD:
+            layers.append(hexagon_layer("fleet-stops", *stops))
+        else:
+            layers.append(point_layer("fleet-stops", *stops, color=STOP_COLOR, radius=20, binary=binary))
+    if couriers is not None and len(couriers[0]):
+        layers.append(point_layer("fleet-couriers", *couriers, color=COURIER_COLOR, radius=40, binary=binary))
+    return layers
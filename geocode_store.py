@@ -0,0 +1,129 @@
+"""Persistent geocoding cache shared by the TomTom and Nominatim paths.
+
+Depot and customer addresses repeat all day, so every resolved address is kept
+in a small SQLite database that survives restarts. Keys are normalized address
+strings and each row records which provider resolved it. Addresses that the
+provider could not find are stored too (negative caching) with a shorter TTL,
+so a typo doesn't hit the API on every "Plan Route" click.
+"""
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+GEOCODE_DB_PATH = os.getenv(
+    "GEOCODE_DB_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "geocode_cache.sqlite")
+)
+GEOCODE_TTL = int(os.getenv("GEOCODE_TTL", str(30 * 24 * 3600)))          # found: 30 days
+GEOCODE_NEGATIVE_TTL = int(os.getenv("GEOCODE_NEGATIVE_TTL", str(24 * 3600)))  # not found: 1 day
+
+# Returned by lookup() when the store has nothing usable for an address
+MISS = object()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS geocode (
+    key       TEXT PRIMARY KEY,
+    address   TEXT NOT NULL,
+    provider  TEXT NOT NULL,
+    lat       REAL,
+    lon       REAL,
+    stored_at REAL NOT NULL
+)
+"""
+
+
+def normalize_address(address):
+    """'  Carrer de Balmes,  10 ' -> 'carrer de balmes 10'"""
+    text = unicodedata.normalize("NFKC", address).casefold()
+    text = re.sub(r"[,;.]+", " ", text)
+    return " ".join(text.split())
+
+
+def location_to_point(location):
+    """geopy Location (or None) -> (lat, lon) (or None)"""
+    if location is None:
+        return None
+    return location.latitude, location.longitude
+
+
+class GeocodeStore:
+    """SQLite-backed address -> (lat, lon) cache with TTL and negative entries"""
+
+    def __init__(self, path=GEOCODE_DB_PATH, ttl=GEOCODE_TTL, negative_ttl=GEOCODE_NEGATIVE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._lock = threading.Lock()
+        # One connection shared by all Streamlit sessions, serialized by the lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+
+    def lookup(self, address):
+        """Return (lat, lon), None for a cached failure, or MISS"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT lat, lon, stored_at FROM geocode WHERE key = ?", (normalize_address(address),)
+            ).fetchone()
+        if row is None:
+            return MISS
+        lat, lon, stored_at = row
+        found = lat is not None
+        if time.time() - stored_at > (self.ttl if found else self.negative_ttl):
+            return MISS
+        return (lat, lon) if found else None
+
+    def store(self, address, provider, point):
+        """Record a result; `point` is (lat, lon) or None when not found"""
+        lat, lon = point if point is not None else (None, None)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO geocode (key, address, provider, lat, lon, stored_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (normalize_address(address), address, provider, lat, lon, time.time()),
+            )
+            self._conn.commit()
+
+    def geocode(self, address, provider, loader):
+        """Return the cached point for `address`, calling `loader()` on a miss.
+
+        `loader` returns (lat, lon) or None when the provider has no match. If
+        it raises (network error, bad key, ...) nothing is stored.
+        """
+        point = self.lookup(address)
+        if point is not MISS:
+            return point
+        point = loader()
+        self.store(address, provider, point)
+        return point
+
+    def purge_expired(self):
+        """Delete rows past their TTL"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM geocode WHERE (lat IS NOT NULL AND stored_at < ?) OR (lat IS NULL AND stored_at < ?)",
+                (now - self.ttl, now - self.negative_ttl),
+            )
+            self._conn.commit()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Process-wide store, opened on first use"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = GeocodeStore()
+    return _store
+
+
+def geocode(address, provider, loader):
+    """Shortcut for get_store().geocode(...)"""
+    return get_store().geocode(address, provider, loader)
@@ -0,0 +1,120 @@
+"""Polyline simplification for map rendering.
+
+TomTom returns every vertex of a route, and long routes embed thousands of
+points into the folium HTML on each rerun. For drawing, points closer to the
+line than about one screen pixel are invisible, so the polyline is simplified
+with a tolerance derived from the map zoom. Only the drawn copy is simplified;
+distance and corridor calculations keep using the full geometry.
+
+Two algorithms are available:
+- Douglas-Peucker: keeps points farther than the tolerance from the chord,
+- Visvalingam-Whyatt: drops the points that form the smallest triangles,
+  which tends to look smoother at low zoom.
+"""
+import heapq
+import math
+
+import numpy as np
+
+METERS_PER_DEG = 111_320.0
+EARTH_CIRCUMFERENCE_M = 40_075_016.686
+TILE_SIZE_PX = 256
+
+# Deviation (in screen pixels) that is allowed to disappear
+DEFAULT_PIXEL_TOLERANCE = 1.0
+
+
+def meters_per_pixel(zoom, lat):
+    """Ground resolution of a Web Mercator map at `zoom` and latitude `lat`"""
+    return EARTH_CIRCUMFERENCE_M * math.cos(math.radians(lat)) / (TILE_SIZE_PX * 2 ** zoom)
+
+
+def tolerance_for_zoom(zoom, lat, pixels=DEFAULT_PIXEL_TOLERANCE):
+    """Simplification tolerance in metres for a map shown at `zoom`"""
+    return pixels * meters_per_pixel(zoom, lat)
+
+
+def _project(line):
+    """(lat, lon) degrees -> local x/y metres around the line's mean latitude"""
+    kx = METERS_PER_DEG * math.cos(math.radians(float(line[:, 0].mean())))
+    return np.column_stack([line[:, 1] * kx, line[:, 0] * METERS_PER_DEG])
+
+
+def douglas_peucker_mask(xy, tolerance):
+    """Boolean mask of the vertices kept by Douglas-Peucker"""
+    n = len(xy)
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        a, b = xy[start], xy[end]
+        inner = xy[start + 1:end]
+        ab = b - a
+        length = math.hypot(ab[0], ab[1])
+        if length == 0:
+            dist = np.hypot(inner[:, 0] - a[0], inner[:, 1] - a[1])
+        else:
+            dist = np.abs(ab[0] * (inner[:, 1] - a[1]) - ab[1] * (inner[:, 0] - a[0])) / length
+        i = int(np.argmax(dist))
+        if dist[i] > tolerance:
+            split = start + 1 + i
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+    return keep
+
+
+def _triangle_area(xy, a, b, c):
+    return abs((xy[b, 0] - xy[a, 0]) * (xy[c, 1] - xy[a, 1]) - (xy[c, 0] - xy[a, 0]) * (xy[b, 1] - xy[a, 1])) / 2
+
+
+def visvalingam_mask(xy, min_area):
+    """Boolean mask of the vertices kept by Visvalingam-Whyatt"""
+    n = len(xy)
+    keep = np.ones(n, dtype=bool)
+    prev = list(range(-1, n - 1))
+    nxt = list(range(1, n + 1))
+    heap = [(_triangle_area(xy, i - 1, i, i + 1), i) for i in range(1, n - 1)]
+    heapq.heapify(heap)
+    area = {i: a for a, i in heap}
+    while heap:
+        a, i = heapq.heappop(heap)
+        if not keep[i] or a != area[i]:
+            continue  # stale heap entry
+        if a >= min_area:
+            break
+        keep[i] = False
+        p, q = prev[i], nxt[i]
+        nxt[p], prev[q] = q, p
+        for j in (p, q):
+            if 0 < j < n - 1:
+                area[j] = max(_triangle_area(xy, prev[j], j, nxt[j]), a)
+                heapq.heappush(heap, (area[j], j))
+    return keep
+
+
+def simplify(points, tolerance_m=None, zoom=None, method="douglas-peucker"):
+    """Simplified copy of a [[lat, lon], ...] polyline.
+
+    Pass either `tolerance_m` or a map `zoom` (the tolerance is then about one
+    pixel at that zoom). Endpoints are always kept.
+    """
+    line = np.asarray(points, dtype=float).reshape(-1, 2)
+    if len(line) < 3:
+        return line.tolist()
+    if tolerance_m is None:
+        if zoom is None:
+            raise ValueError("Pass tolerance_m or zoom")
+        tolerance_m = tolerance_for_zoom(zoom, float(line[:, 0].mean()))
+    xy = _project(line)
+    if method == "douglas-peucker":
+        keep = douglas_peucker_mask(xy, tolerance_m)
+    elif method == "visvalingam":
+        # A triangle with base ~tolerance and height ~tolerance
+        keep = visvalingam_mask(xy, tolerance_m * tolerance_m / 2)
+    else:
+        raise ValueError(f"Unknown simplification method: {method}")
+    return line[keep].tolist()
@@ -0,0 +1,148 @@
+"""Deferred imports for heavy libraries, and a per-module start-up report.
+
+Streamlit runs an app's module-level code before the first paint, and the apps
+imported pandas, pydeck, altair, folium and geopy up front (courier_app_fixed
+even imported matplotlib without using it), so a cold pod paid for libraries
+that only the map or route section needs. `lazy("folium")` returns a stand-in
+that imports the module on first attribute access, and
+`lazy_attr("geopy.distance", "distance")` a function that imports on first
+call, so a library loads when its section first renders. The time each
+deferred import took is recorded in `load_times`.
+
+    python lazy_imports.py courier_app_fixed.py [--runs 3]
+
+reports what each module-level import of a script costs in a cold interpreter
+(from `python -X importtime`, best of --runs), most expensive first, without
+running the script. A dependency shared by several imports is charged to the
+first one that pulls it in, which is what it adds to start-up.
+"""
+import argparse
+import ast
+import importlib
+import os
+import subprocess
+import sys
+import time
+
+# module name -> seconds its deferred import took
+load_times = {}
+
+_MARKER = "@@lazy_imports "
+
+
+def _load(name):
+    module = sys.modules.get(name)
+    if module is None:
+        started = time.perf_counter()
+        module = importlib.import_module(name)
+        load_times.setdefault(name, time.perf_counter() - started)
+    return module
+
+
+class LazyModule:
+    """Module stand-in that imports `name` on first attribute access"""
+
+    def __init__(self, name):
+        self.__dict__["_name"] = name
+        self.__dict__["_module"] = None
+
+    def _resolve(self):
+        module = self.__dict__["_module"]
+        if module is None:
+            module = self.__dict__["_module"] = _load(self._name)
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._resolve(), attr)
+
+    def __dir__(self):
+        return dir(self._resolve())
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__["_module"] is not None else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+def lazy(name):
+    """Stand-in for `import name`"""
+    return LazyModule(name)
+
+
+def lazy_attr(module, attr):
+    """Stand-in for `from module import attr` when `attr` is called (a function or class)"""
+    def call(*args, **kwargs):
+        return getattr(_load(module), attr)(*args, **kwargs)
+    call.__name__ = call.__qualname__ = attr
+    return call
+
+
+def script_imports(path):
+    """Modules a script imports at module level, in order"""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), path)
+    names = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            names.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+            names.append(node.module)
+    return list(dict.fromkeys(names))
+
+
+def import_costs(modules, cwd=None, python=sys.executable):
+    """{module: microseconds, or None if it failed} for importing `modules` in order, cold"""
+    lines = ["import sys"]
+    for name in modules:
+        lines += [
+            "try:",
+            f"    import {name}",
+            f"    sys.stderr.write({_MARKER + name + ' ok'!r} + '\\n')",
+            "except Exception:",
+            f"    sys.stderr.write({_MARKER + name + ' failed'!r} + '\\n')",
+        ]
+    result = subprocess.run([python, "-X", "importtime", "-c", "\n".join(lines)],
+                            cwd=cwd, capture_output=True, text=True)
+
+    costs, pending = {}, 0
+    for line in result.stderr.splitlines():
+        if line.startswith(_MARKER):
+            name, status = line[len(_MARKER):].rsplit(" ", 1)
+            costs[name] = pending if status == "ok" else None
+            pending = 0
+        elif line.startswith("import time:"):
+            # "import time: <self us> | <cumulative us> | <indent><package>"; depth 0 has one space
+            parts = line[len("import time:"):].split("|")
+            if len(parts) == 3 and parts[1].strip().isdigit() and not parts[2].startswith("  "):
+                pending += int(parts[1])
+    return costs
+
+
+def report(path, runs=1):
+    """[(module, milliseconds or None)] for a script's imports, most expensive first"""
+    modules = script_imports(path)
+    cwd = os.path.dirname(os.path.abspath(path))
+    samples = [import_costs(modules, cwd) for _ in range(runs)]
+    rows = []
+    for name in modules:
+        values = [sample[name] for sample in samples if sample.get(name) is not None]
+        rows.append((name, min(values) / 1000 if values else None))
+    return sorted(rows, key=lambda row: (row[1] is None, -(row[1] or 0)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report the import cost of each module a script imports")
+    parser.add_argument("scripts", nargs="+")
+    parser.add_argument("--runs", type=int, default=3, help="cold interpreters per script (best is kept)")
+    args = parser.parse_args()
+
+    for path in args.scripts:
+        rows = report(path, args.runs)
+        total = sum(ms for _, ms in rows if ms is not None)
+        print(f"{path}: {total:.0f} ms in module-level imports")
+        for name, ms in rows:
+            cost = "not importable" if ms is None else f"{ms:8.1f} ms  {ms / total:5.1%}" if total else f"{ms:8.1f} ms"
+            print(f"  {name:<24} {cost}")
+
+
+if __name__ == "__main__":
+    main()
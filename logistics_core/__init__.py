@@ -0,0 +1,32 @@
+"""Briefing logic shared by every app variant, the batch CLI and the JSON service.
+
+get_weather, get_news, find_gas_stations, get_safety_tips and generate_map
+were copied into courier_app_fixed, its (1) copy, deff_app, trial_1, Final2_lg
+and the courier_briefing_app_* scripts with small differences, so a fix or a
+speed-up had to be made in every copy. They live here once; the apps import
+them and keep only their layout. The differences that mattered are
+parameters: generate_map(marker=...) for the point, hexagon or bare map, and
+logistics_core.ui.get_news(simulate_on_error=...) for showing simulated
+headlines or the error. weather_summary and headlines give the text form the
+briefing apps show, with their error wording and weather retry.
+
+logistics_core.ui holds the Streamlit wrappers (spinners, warnings) and is not
+imported here, so scripts and the service can use the package without
+Streamlit. benchmark_apps.py times each app variant against this package.
+"""
+from logistics_core.briefing import build_briefing
+from logistics_core.maps import generate_map
+from logistics_core.news import (
+    briefing_news_error, get_news, headlines, is_simulated, news_error, news_items, simulated_news,
+)
+from logistics_core.weather import fetch_weather, get_weather, weather_summary
+from logistics_core.zone import (
+    TRAFFIC_LEVELS, current_traffic, find_gas_stations, get_safety_tips, traffic_level,
+)
+
+__all__ = [
+    "build_briefing", "generate_map",
+    "briefing_news_error", "get_news", "headlines", "is_simulated", "news_error", "news_items", "simulated_news",
+    "fetch_weather", "get_weather", "weather_summary",
+    "TRAFFIC_LEVELS", "current_traffic", "find_gas_stations", "get_safety_tips", "traffic_level",
+]
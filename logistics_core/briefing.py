@@ -0,0 +1,48 @@
+"""Assemble the briefing dict the apps save, without Streamlit."""
+from datetime import datetime
+
+import briefing_engine
+from logistics_core.news import get_news
+from logistics_core.weather import get_weather
+from logistics_core.zone import current_traffic, find_gas_stations, get_safety_tips, traffic_level
+
+
+def build_briefing(city, country, weather_key, news_key):
+    """Briefing dict for one zone, as saved by the app, plus safety tips"""
+    results = briefing_engine.run_sources(
+        {
+            "weather": lambda: get_weather(city, weather_key),
+            "news": lambda: get_news(country, city, news_key),
+        },
+        fallbacks={
+            "weather": (False, "Weather source timed out"),
+            "news": (False, [{"title": "News source timed out", "url": "#", "source": "Error"}]),
+        },
+    )
+    weather_success, weather_data = results["weather"]
+    news_success, news_data = results["news"]
+
+    if weather_success and isinstance(weather_data, dict):
+        stations_level, stations_details, _ = find_gas_stations(weather_data["lat"], weather_data["lon"])
+    else:
+        stations_level, stations_details = "Unknown", "Weather data required to find nearby stations"
+
+    now = datetime.now()
+    intensity = current_traffic(city, now.hour)
+    return {
+        "zone": city,
+        "country": country,
+        "timestamp": now.isoformat(),
+        "weather": weather_data if weather_success else None,
+        "news": news_data if news_success else None,
+        "safety_tips": get_safety_tips(weather_data if weather_success else None),
+        "gas_stations": {
+            "level": stations_level,
+            "details": stations_details
+        },
+        "traffic": {
+            "current_hour": now.hour,
+            "status": traffic_level(intensity)[1],
+            "intensity": intensity
+        }
+    }
@@ -0,0 +1,65 @@
+"""The pydeck zone map, in the three looks the app variants use."""
+import lazy_imports
+
+# Loaded when the first map is drawn
+pdk = lazy_imports.lazy("pydeck")
+fleet_map = lazy_imports.lazy("fleet_map")
+
+
+def _zone_layer(lat, lon, marker):
+    if marker == "point":
+        return pdk.Layer(
+            "ScatterplotLayer",
+            data=[{"position": [lon, lat], "color": [0, 0, 255], "radius": 100}],
+            get_position="position",
+            get_color="color",
+            get_radius="radius",
+            pickable=True
+        )
+    if marker == "hexagon":
+        return pdk.Layer(
+            "HexagonLayer",
+            data=[{"lat": lat, "lon": lon}],
+            get_position=["lon", "lat"],
+            auto_highlight=True,
+            elevation_scale=50,
+            pickable=True,
+            elevation_range=[0, 300],
+            extruded=True,
+            coverage=1,
+            radius=1000,
+        )
+    raise ValueError(f"unknown zone marker {marker!r}")
+
+
+def generate_map(lat, lon, zoom=12, marker="point", fleet=None):
+    """Generate an interactive 3D map for the location
+
+    `marker` draws the zone center as a "point", a 3D "hexagon" column, or
+    nothing (None). `fleet` switches on the dispatch view: a dict with
+    `couriers` and `stops` as (lats, lons) arrays and `routes` as a list of
+    polylines (see fleet_map).
+    """
+    # Set the viewport location
+    view_state = pdk.ViewState(
+        longitude=lon,
+        latitude=lat,
+        zoom=zoom,
+        min_zoom=5,
+        max_zoom=15,
+        pitch=40.5,
+        bearing=-27.36
+    )
+
+    layers = [_zone_layer(lat, lon, marker)] if marker else []
+    if fleet:
+        # Fleet-scale layers built from columnar arrays, drawn under the zone center
+        layers = fleet_map.fleet_layers(**fleet) + layers
+
+    # Combined all of it and render a viewport
+    return pdk.Deck(
+        map_style="mapbox://styles/mapbox/light-v9",
+        initial_view_state=view_state,
+        layers=layers,
+        tooltip={"text": "Delivery Zone Center"},
+    )
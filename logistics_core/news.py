@@ -0,0 +1,100 @@
+"""Delivery-relevant headlines from the shared news cache."""
+import requests
+
+import news_cache
+import provider_client
+
+NEWS_ERRORS = {
+    401: "API key error. Please check your NewsAPI key.",
+    429: "Too many requests. API rate limit exceeded.",
+}
+# The briefing apps' wording for the same failures
+BRIEFING_NEWS_ERRORS = {
+    401: "API key error. Please check your NewsAPI key.",
+}
+NO_NEWS = "No significant news affecting deliveries at this time"
+
+
+def news_items(country_code, city, api_key, limit=5):
+    """Delivery-relevant headlines (or the top ones) as title/url/source dicts.
+
+    Raises news_cache.NewsAPIError or a requests exception on failure.
+    """
+    articles, relevant_articles = news_cache.get_headlines(country_code, city, api_key)
+    display_articles = relevant_articles[:limit] if relevant_articles else articles[:limit]
+    if not display_articles:
+        return [{"title": NO_NEWS, "url": "#", "source": "System"}]
+    return [
+        {
+            "title": article.get("title", "No title available"),
+            "url": article.get("url", "#"),
+            "source": article.get("source", {}).get("name", "Unknown") if article.get("source") else "Unknown"
+        }
+        for article in display_articles
+    ]
+
+
+def news_error(error):
+    """User-facing message for an exception raised by news_items"""
+    if isinstance(error, news_cache.NewsAPIError):
+        return NEWS_ERRORS.get(error.status_code, f"Error fetching news (Status: {error.status_code})")
+    return f"Error fetching news: {provider_client.error_text(error)}"
+
+
+def briefing_news_error(error):
+    """news_error as worded by the briefing apps"""
+    if isinstance(error, news_cache.NewsAPIError):
+        return BRIEFING_NEWS_ERRORS.get(error.status_code, f"News API error (Status: {error.status_code})")
+    return f"Network error while fetching news data: {provider_client.error_text(error)}"
+
+
+def get_news(country_code, city, api_key, limit=5):
+    """(success, news items); errors come back as a single error item"""
+    try:
+        return True, news_items(country_code, city, api_key, limit)
+    except (news_cache.NewsAPIError, requests.exceptions.RequestException) as e:
+        return False, [{"title": news_error(e), "url": "#", "source": "Error"}]
+
+
+def headlines(country_code, city, api_key, limit=3):
+    """(success, [title]) as shown by the briefing apps"""
+    try:
+        items = news_items(country_code, city, api_key, limit)
+    except (news_cache.NewsAPIError, requests.exceptions.RequestException) as e:
+        return False, [briefing_news_error(e)]
+    return True, [item["title"] for item in items]
+
+
+def is_simulated(items):
+    """True if `items` came from simulated_news"""
+    return any(item.get("simulated") for item in items)
+
+
+def simulated_news(city):
+    """Generate simulated news when API fails (items are marked "simulated")"""
+    return [
+        {
+            "title": f"Traffic delays reported on main avenue in {city} due to construction",
+            "url": "#",
+            "source": "Traffic Update",
+            "simulated": True
+        },
+        {
+            "title": f"New delivery routes established in {city} downtown area",
+            "url": "#",
+            "source": "Courier News",
+            "simulated": True
+        },
+        {
+            "title": f"Weather conditions affecting delivery times in {city} suburban areas",
+            "url": "#",
+            "source": "Weather Alert",
+            "simulated": True
+        },
+        {
+            "title": f"Local businesses report increased delivery demands in {city}",
+            "url": "#",
+            "source": "Business Times",
+            "simulated": True
+        }
+    ]
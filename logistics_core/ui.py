@@ -0,0 +1,51 @@
+"""Streamlit wrappers around the core lookups (spinners and warnings).
+
+Kept out of the package namespace so the CLI and the JSON service can import
+logistics_core without Streamlit.
+"""
+import requests
+import streamlit as st
+
+import news_cache
+import provider_client
+from logistics_core import news, weather
+
+# Warnings shown before falling back to simulated headlines
+SIMULATED_WARNINGS = {
+    401: "API key error. Using simulated news data.",
+    429: "Too many requests. Using simulated news data.",
+}
+
+
+def get_weather(city, api_key):
+    """Get weather information for a city, served from the shared weather cache"""
+    if weather.is_cached(city):
+        return weather.get_weather(city, api_key)
+    with st.spinner(f"Fetching weather data for {city}..."):
+        return weather.get_weather(city, api_key)
+
+
+def get_news(country_code, city, api_key, simulate_on_error=True):
+    """Get news headlines for a location
+
+    On failure either shows a warning and returns simulated headlines
+    (`simulate_on_error`), or returns the error as a single news item.
+    """
+    with st.spinner(f"Fetching local news for {city}, {country_code.upper()}..."):
+        try:
+            # Shared across sessions and refreshed at most once per TTL
+            return True, news.news_items(country_code, city, api_key)
+        except (news_cache.NewsAPIError, requests.exceptions.RequestException) as e:
+            if not simulate_on_error:
+                return False, [{"title": news.news_error(e), "url": "#", "source": "Error"}]
+            st.warning(simulated_warning(e))
+            return True, news.simulated_news(city)
+
+
+def simulated_warning(error):
+    """Warning for a news failure that is answered with simulated headlines"""
+    if isinstance(error, news_cache.NewsAPIError):
+        return SIMULATED_WARNINGS.get(
+            error.status_code, f"Error fetching news (Status: {error.status_code}). Using simulated data."
+        )
+    return f"Error fetching news: {provider_client.error_text(error)}. Using simulated data."
@@ -0,0 +1,71 @@
+"""OpenWeatherMap lookups shared by every app variant."""
+import time
+
+import requests
+
+import provider_client
+import weather_cache
+
+WEATHER_API_URL = "https://api.openweathermap.org/data/2.5/weather"
+# The briefing apps try twice, a second apart, before showing an API error
+BRIEFING_ATTEMPTS = 2
+RETRY_DELAY = 1
+
+
+def fetch_weather(city, api_key, attempts=1):
+    """Get weather information for a city
+
+    Statuses other than 200, 401 and 404 are retried up to `attempts` times,
+    RETRY_DELAY seconds apart.
+    """
+    params = {"q": city, "appid": api_key.strip(), "units": "metric"}
+
+    try:
+        for attempt in range(attempts):
+            if attempt:
+                time.sleep(RETRY_DELAY)
+            response = provider_client.get(WEATHER_API_URL, params=params, timeout=10)
+            if response.status_code in (200, 401, 404):
+                break
+
+        if response.status_code == 200:
+            data = response.json()
+            weather_details = {
+                "description": data["weather"][0]["description"].capitalize(),
+                "temp": data["main"]["temp"],
+                "icon": data["weather"][0]["icon"],
+                "humidity": data["main"]["humidity"],
+                "wind_speed": data["wind"]["speed"],
+                # Condition group ("Rain", "Snow", ...) for the dashboard alerts
+                "main": data["weather"][0]["main"],
+                # Coordinates for the map
+                "lat": data["coord"]["lat"],
+                "lon": data["coord"]["lon"]
+            }
+            return True, weather_details
+        elif response.status_code == 401:
+            return False, "API key error. Please check your OpenWeatherMap API key."
+        elif response.status_code == 404:
+            return False, f"City '{city}' not found. Please check spelling."
+
+        return False, f"Weather API error (Status: {response.status_code})"
+
+    except requests.exceptions.RequestException as e:
+        return False, f"Network error while fetching weather data: {provider_client.error_text(e)}"
+
+
+def get_weather(city, api_key, attempts=1):
+    """Weather for a city from the shared weather cache"""
+    return weather_cache.cached_weather(city, lambda: fetch_weather(city, api_key, attempts))
+
+
+def is_cached(city):
+    return weather_cache.is_cached(city)
+
+
+def weather_summary(city, api_key):
+    """(success, (text, temp)) as shown by the briefing apps, e.g. (True, ("21.5°C, Clear sky", 21.5))"""
+    success, data = get_weather(city, api_key, attempts=BRIEFING_ATTEMPTS)
+    if not success:
+        return False, (data, None)
+    return True, (f"{data['temp']}°C, {data['description']}", data["temp"])
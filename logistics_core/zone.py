@@ -0,0 +1,69 @@
+"""Gas stations, safety tips and traffic level for a zone."""
+from datetime import datetime
+
+import traffic_sim
+
+# (minimum intensity, status class, label, emoji), checked top to bottom
+TRAFFIC_LEVELS = [
+    (0.7, "danger", "Heavy traffic", "🔴"),
+    (0.4, "warning", "Moderate traffic", "🟡"),
+    (0.0, "success", "Light traffic", "🟢"),
+]
+
+
+def find_gas_stations(lat, lon):
+    """Find gas stations near the specified location"""
+    now = datetime.now().hour
+
+    # Simple time-based patterns
+    if 7 <= now <= 10:  # Morning commute
+        return "High", f"5+ gas stations open within 3km radius", "🟢"
+    elif 17 <= now <= 20:  # Evening commute
+        return "Medium", f"3-4 gas stations open within 3km radius", "🟡"
+    elif now >= 22 or now <= 6:  # Late night
+        return "Low", f"Limited gas stations open for 24h service", "🔴"
+    else:
+        return "Medium", "Normal gas station operations in your area", "🟡"
+
+
+def get_safety_tips(weather_data):
+    """Generate safety tips based on weather conditions"""
+    if not isinstance(weather_data, dict):
+        return ["No specific weather-related safety concerns. Proceed normally."]
+
+    tips = []
+    temp = weather_data.get("temp", 20)
+    description = weather_data.get("description", "").lower()
+
+    if "rain" in description or "shower" in description:
+        tips.append("Roads may be slippery. Maintain safe distance and reduce speed.")
+    elif "snow" in description:
+        tips.append("Snow conditions reported. Use winter equipment and drive cautiously.")
+    elif "fog" in description:
+        tips.append("Reduced visibility. Use fog lights and reduce speed.")
+    elif "storm" in description or "thunder" in description:
+        tips.append("Stormy conditions. Seek shelter if lightning intensifies.")
+
+    if temp >= 30:
+        tips.append("High temperature. Stay hydrated and avoid prolonged sun exposure.")
+    elif temp <= 5:
+        tips.append("Cold temperature. Wear appropriate clothing and watch for ice.")
+
+    if not tips:
+        tips.append("No specific weather-related safety concerns. Proceed normally.")
+
+    return tips
+
+
+def traffic_level(intensity):
+    """Traffic intensity (0-1) -> (status class, label, emoji)"""
+    for minimum, level, label, emoji in TRAFFIC_LEVELS:
+        if intensity > minimum:
+            return level, label, emoji
+    return TRAFFIC_LEVELS[-1][1:]
+
+
+def current_traffic(city, hour=None):
+    """Simulated traffic intensity for `city` at `hour` (default: now)"""
+    hour = datetime.now().hour if hour is None else hour
+    return float(traffic_sim.simulated_traffic(city)[hour])
@@ -0,0 +1,48 @@
+"""Rendered-map cache keyed by map content.
+
+Every rerun used to rebuild the folium.Map, its markers, route polyline and
+incident markers, then serialize the whole thing to HTML, even when nothing
+had changed. Here the map is identified by a hash of what it shows (center,
+markers, polyline, incidents); when the same content is requested again the
+cached HTML is returned and the map is neither built nor serialized. The cache
+is shared by all sessions and bounded by MAP_CACHE_MAX_BYTES of HTML, evicting
+the least recently used maps first.
+"""
+import hashlib
+import json
+import os
+
+from ttl_cache import TTLCache
+
+MAP_CACHE_MAX_BYTES = int(os.getenv("MAP_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+MAP_CACHE_TTL = int(os.getenv("MAP_CACHE_TTL", "3600"))
+
+_cache = TTLCache(
+    ttl=MAP_CACHE_TTL,
+    stale_ttl=0,
+    max_entries=10_000,
+    max_bytes=MAP_CACHE_MAX_BYTES,
+    sizeof=lambda html: len(html.encode("utf-8")),
+)
+
+
+def content_key(**parts):
+    """Stable hash of everything that ends up on the map"""
+    payload = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def figure_html(m):
+    """HTML for a folium.Map, the same document folium_static renders"""
+    import folium
+
+    return folium.Figure().add_child(m).render()
+
+
+def cached_map_html(key, build_map, render=figure_html):
+    """HTML for the map identified by `key`; `build_map()` only runs on a miss"""
+    return _cache.get(key, lambda: render(build_map()))
+
+
+def clear():
+    _cache.invalidate()
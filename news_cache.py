@@ -0,0 +1,221 @@
+"""Shared NewsAPI headline cache keyed by (country, query).
+
+get_news fetched top-headlines on every rerun, plus a second category=general
+request whenever the city query came back empty, so many couriers online meant
+many identical requests and 429s. Here each (country, query) key is fetched at
+most once per TTL across all sessions: while one fetch is in flight, other
+callers for the same key wait for its result instead of sending their own.
+Articles are deduplicated by a hash of their URL, and only articles not seen
+before for a key are scored for relevance. A failed fetch (429, network error)
+is remembered for NEWS_ERROR_TTL; during that time the last good headlines are
+served, or the error is re-raised when there are none. Authentication errors
+(401/403) are never cached: the key is not part of the cache key, so one bad
+key must not break news for every other session.
+
+search_articles serves NewsAPI's /everything search (used by the delivery
+dashboards, which have no country) through the same cache and TTL.
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import news_relevance
+import provider_client
+
+NEWS_API_URL = "https://newsapi.org/v2/top-headlines"
+NEWS_SEARCH_URL = "https://newsapi.org/v2/everything"
+NEWS_QUERY_TTL = int(os.getenv("NEWS_QUERY_TTL", "600"))      # city query: 10 minutes
+NEWS_GENERAL_TTL = int(os.getenv("NEWS_GENERAL_TTL", "1800"))  # general headlines: 30 minutes
+NEWS_ERROR_TTL = int(os.getenv("NEWS_ERROR_TTL", "120"))       # back off after an error
+NEWS_CACHE_KEYS = int(os.getenv("NEWS_CACHE_KEYS", "512"))
+# Answers that depend on the caller's API key rather than on the query
+AUTH_ERRORS = (401, 403)
+# Scores kept per key, so articles that drop out and come back are not rescored
+MAX_SCORES_PER_KEY = 500
+
+
+class NewsAPIError(Exception):
+    """Non-200 answer from NewsAPI"""
+
+    def __init__(self, status_code):
+        super().__init__(f"News API error (Status: {status_code})")
+        self.status_code = status_code
+
+
+def url_hash(article):
+    """Identity of an article: its URL, or its title when it has none"""
+    ident = article.get("url") or article.get("title") or ""
+    return hashlib.sha1(ident.encode("utf-8")).hexdigest()
+
+
+def cache_key(country, query):
+    return country.strip().lower(), " ".join((query or "").split()).casefold()
+
+
+def fetch_top_headlines(country, query, api_key):
+    """Articles for `query`, or general headlines when `query` is empty"""
+    params = {"country": country, "apiKey": api_key.strip()}
+    if query:
+        params["q"] = query
+    else:
+        params["category"] = "general"
+    response = provider_client.get(NEWS_API_URL, params=params, timeout=10)
+    if response.status_code != 200:
+        raise NewsAPIError(response.status_code)
+    return response.json().get("articles", [])
+
+
+def fetch_everything(query, api_key, language="en", page_size=5):
+    """Articles mentioning `query` from NewsAPI's /everything endpoint"""
+    params = {"q": query, "language": language, "pageSize": page_size, "apiKey": api_key.strip()}
+    response = provider_client.get(NEWS_SEARCH_URL, params=params, timeout=10)
+    if response.status_code != 200:
+        raise NewsAPIError(response.status_code)
+    return response.json().get("articles", [])
+
+
+class _Entry:
+    __slots__ = ("scored", "scores", "expires_at", "error")
+
+    def __init__(self):
+        self.scored = []              # [(article, score)] in upstream order
+        self.scores = OrderedDict()   # url hash -> score
+        self.expires_at = 0.0
+        self.error = None
+
+
+class NewsCache:
+    """Per-key TTL cache with single-flight fetches"""
+
+    def __init__(self, max_keys=NEWS_CACHE_KEYS):
+        self.max_keys = max_keys
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.fetches = 0
+
+    def get(self, key, fetch, ttl):
+        """[(article, score)] for `key`; `fetch()` runs in at most one thread per key"""
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and time.monotonic() < entry.expires_at:
+                    self._entries.move_to_end(key)
+                    if entry.error is not None and not entry.scored:
+                        raise entry.error
+                    return entry.scored
+                done = self._inflight.get(key)
+                if done is None:
+                    done = self._inflight[key] = threading.Event()
+                    break
+            # Someone else is fetching this key; use their result
+            done.wait()
+
+        try:
+            entry = self._load(key, fetch, ttl, entry or _Entry())
+        finally:
+            with self._lock:
+                self._inflight.pop(key).set()
+        if entry.error is not None and not entry.scored:
+            raise entry.error
+        return entry.scored
+
+    def _load(self, key, fetch, ttl, entry):
+        """Fetch and store `key`; returns the stored entry (auth errors are raised, not stored)"""
+        self.fetches += 1
+        try:
+            articles = fetch()
+        except NewsAPIError as e:
+            if e.status_code in AUTH_ERRORS:
+                raise
+            return self._store_error(key, entry, e)
+        except Exception as e:
+            return self._store_error(key, entry, e)
+
+        # Only the fetching thread touches entry.scores, so no lock is needed here
+        matcher = news_relevance.get_matcher()
+        seen = set()
+        scored = []
+        for article in articles:
+            h = url_hash(article)
+            if h in seen:
+                continue
+            seen.add(h)
+            if h not in entry.scores:
+                entry.scores[h] = matcher.score(article.get("title"))
+            scored.append((article, entry.scores[h]))
+        for h in list(entry.scores)[: max(0, len(entry.scores) - MAX_SCORES_PER_KEY)]:
+            if h not in seen:
+                del entry.scores[h]
+
+        entry.scored = scored
+        entry.error = None
+        entry.expires_at = time.monotonic() + ttl
+        self._store(key, entry)
+        return entry
+
+    def _store_error(self, key, entry, error):
+        entry.error = error
+        entry.expires_at = time.monotonic() + NEWS_ERROR_TTL
+        self._store(key, entry)
+        return entry
+
+    def _store(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_keys:
+                self._entries.popitem(last=False)
+
+    def expire(self, key):
+        """Make `key` due for refetch while keeping its headlines as the fallback"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.expires_at = 0.0
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+
+_cache = NewsCache()
+
+
+def get_headlines(country, query, api_key, limit=10, min_score=news_relevance.MIN_SCORE):
+    """Top `limit` headlines and the delivery-relevant ones among them.
+
+    Falls back to the country's general headlines when `query` has none.
+    Raises NewsAPIError or a requests exception when nothing can be served.
+    """
+    scored = _cache.get(cache_key(country, query),
+                        lambda: fetch_top_headlines(country, query, api_key), NEWS_QUERY_TTL)
+    if not scored and query:
+        scored = _cache.get(cache_key(country, ""),
+                            lambda: fetch_top_headlines(country, "", api_key), NEWS_GENERAL_TTL)
+    scored = scored[:limit]
+    return [article for article, _ in scored], news_relevance.rank_scored(scored, min_score)
+
+
+def search_articles(query, api_key, language="en", limit=5):
+    """Up to `limit` articles mentioning `query`, cached like get_headlines.
+
+    Raises NewsAPIError or a requests exception when nothing can be served.
+    """
+    key = ("everything", language, limit, " ".join(query.split()).casefold())
+    scored = _cache.get(key, lambda: fetch_everything(query, api_key, language, limit), NEWS_QUERY_TTL)
+    return [article for article, _ in scored]
+
+
+def expire(country, query):
+    """Have the next get_headlines for (country, query) go upstream"""
+    _cache.expire(cache_key(country, query))
+
+
+def clear():
+    _cache.invalidate()
@@ -0,0 +1,128 @@
+"""Delivery relevance scoring for news headlines.
+
+get_news used to keep headlines containing any of a handful of English
+keywords, with a different list in every app. Our zones are in Spain, so the
+term set here covers English, Spanish and Catalan, and every term carries a
+weight. All terms are compiled into a single regular expression over
+accent-folded, case-folded text, so "Tráfico", "TRAFICO" and "trafico" all
+match, and a headline is scanned once no matter how many terms there are.
+
+A term ending in "*" matches as a prefix ("accident*" also matches
+"accidente", "accidents"); other terms match whole words or phrases. Extra
+terms or weight overrides can be supplied as a JSON object in the file named by
+NEWS_TERMS_PATH.
+"""
+import json
+import os
+import re
+import threading
+import unicodedata
+
+NEWS_TERMS_PATH = os.getenv("NEWS_TERMS_PATH", "")
+# Headlines scoring below this are not considered delivery-relevant
+MIN_SCORE = float(os.getenv("NEWS_MIN_SCORE", "0.5"))
+
+DEFAULT_TERMS = {
+    # English
+    "traffic": 1.0, "congestion": 1.0, "jam": 0.8, "jams": 0.8, "gridlock": 1.0,
+    "accident*": 1.0, "crash*": 1.0, "collision*": 0.9,
+    "closure*": 1.0, "closed": 0.6, "roadwork*": 0.9, "detour*": 0.8, "diversion*": 0.7,
+    "road*": 0.6, "motorway*": 0.6, "highway*": 0.6,
+    "strike*": 0.9, "protest*": 0.8, "demonstration*": 0.8,
+    "flood*": 0.8, "storm*": 0.6, "snow*": 0.6,
+    "marathon*": 0.7, "parade*": 0.6, "event*": 0.5,
+    # Spanish
+    "trafico": 1.0, "atasco*": 1.0, "retenciones": 1.0, "embotellamiento*": 1.0,
+    "accidente*": 1.0, "choque*": 0.8, "colision*": 0.9, "atropello*": 0.8,
+    # Whole words and phrases: "corte*" also matched "Cortes" (the parliament)
+    "corte": 0.9, "corte de calle": 0.9, "cortes de trafico": 0.9, "cortes de calles": 0.9,
+    "cortad*": 0.9, "cierre*": 0.8, "obras": 0.7, "desvio*": 0.8,
+    "carretera*": 0.6, "autopista*": 0.6, "autovia*": 0.6, "dgt": 0.6,
+    "huelga*": 0.9, "manifestacion*": 0.8, "protesta*": 0.8, "concentracion*": 0.5,
+    "inundacion*": 0.8, "temporal": 0.6, "nevada*": 0.6, "lluvia*": 0.4,
+    "maraton*": 0.7, "desfile*": 0.6, "cabalgata*": 0.6, "evento*": 0.5,
+    # Catalan
+    "transit": 1.0, "embus*": 1.0, "cues": 0.6,
+    "accident": 1.0, "xoc": 0.8, "xocs": 0.8,
+    "tall de": 0.9, "talls de": 0.9, "tallad*": 0.9, "tancament*": 0.8, "obres": 0.7, "desviament*": 0.8,
+    "vaga*": 0.9, "manifestacio*": 0.8, "mobilitzacio*": 0.6,
+    "inundacio*": 0.8, "pluja*": 0.4, "marato*": 0.7, "esdeveniment*": 0.5,
+}
+
+
+def fold(text):
+    """'Tráfico CORTADO' -> 'trafico cortado'"""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+def load_terms(path=NEWS_TERMS_PATH):
+    """Default terms merged with the JSON object in `path`, if any"""
+    terms = dict(DEFAULT_TERMS)
+    if path and os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            terms.update(json.load(f))
+    return terms
+
+
+class RelevanceMatcher:
+    """Weighted term set compiled into one regular expression"""
+
+    def __init__(self, terms):
+        self.weights = {}
+        prefixes, words = [], []
+        for term, weight in terms.items():
+            key = fold(term.rstrip("*")).strip()
+            if not key:
+                continue
+            self.weights[key] = float(weight)
+            (prefixes if term.endswith("*") else words).append(key)
+
+        def alternation(keys):
+            # Longest first, so a phrase wins over a shorter term it starts with
+            keys = sorted(set(keys), key=len, reverse=True)
+            return "|".join(re.escape(k).replace(r"\ ", r"\s+") for k in keys) or r"(?!x)x"
+
+        self._pattern = re.compile(
+            rf"\b(?:({alternation(prefixes)})\w*|({alternation(words)})\b)"
+        )
+
+    def matches(self, text):
+        """Distinct terms found in `text`"""
+        found = set()
+        for m in self._pattern.finditer(fold(text or "")):
+            found.add(" ".join((m.group(1) or m.group(2)).split()))
+        return found
+
+    def score(self, text):
+        """Sum of the weights of the distinct terms in `text`"""
+        return sum(self.weights[term] for term in self.matches(text))
+
+    def rank(self, articles, min_score=MIN_SCORE, field="title"):
+        """Articles scoring at least `min_score`, most relevant first"""
+        return rank_scored([(article, self.score(article.get(field))) for article in articles], min_score)
+
+
+def rank_scored(scored, min_score=MIN_SCORE):
+    """(article, score) pairs -> articles scoring at least `min_score`, most relevant first"""
+    kept = [(score, i, article) for i, (article, score) in enumerate(scored) if score >= min_score]
+    return [article for _, _, article in sorted(kept, key=lambda s: (-s[0], s[1]))]
+
+
+_matcher = None
+_matcher_lock = threading.Lock()
+
+
+def get_matcher():
+    """Process-wide matcher for the configured term set"""
+    global _matcher
+    if _matcher is None:
+        with _matcher_lock:
+            if _matcher is None:
+                _matcher = RelevanceMatcher(load_terms())
+    return _matcher
+
+
+def relevant_articles(articles, min_score=MIN_SCORE):
+    """Shortcut for get_matcher().rank(...)"""
+    return get_matcher().rank(articles, min_score)
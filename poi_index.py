@@ -0,0 +1,264 @@
+"""Local spatial index of fuel, EV charging, parking and rest-area POIs.
+
+find_resources, find_parking and find_resources_nearby used to send a TomTom
+POI query on every click. POIs don't move, so every TomTom result (or an
+offline CSV extract) is kept in a grid index: POIs are bucketed into square
+cells of CELL_DEG degrees and queries only look at the cells they overlap.
+
+Each area fetched from the API is remembered as a covered circle. A query
+whose circle lies inside a covered circle is answered locally; only queries
+reaching into cold areas call the API, and their results are added to the
+index. A fetch that comes back with a full page (FETCH_LIMIT results) was
+probably truncated, so it only covers the circle out to its farthest POI.
+The exact circle is still remembered for TRUNCATED_TTL: asking for it again
+would return the same page, so repeated searches in dense areas are answered
+from the index too.
+
+Results keep TomTom's result shape (`poi`, `position`, `address`, `dist` in
+metres) so the apps can format them as before.
+"""
+import csv
+import math
+import threading
+import time
+from collections import defaultdict
+
+import numpy as np
+
+from distance_matrix import haversine
+
+CELL_DEG = 0.01  # ~1.1 km of latitude
+METERS_PER_DEG = 111_320.0
+COVERAGE_TTL = 7 * 24 * 3600  # POIs rarely change; refetch covered areas weekly
+FETCH_LIMIT = 100  # TomTom poiSearch page size the apps request
+TRUNCATED_TTL = 24 * 3600  # how long a truncated fetch answers the same circle
+
+# TomTom category ids used by the apps
+CATEGORIES = {
+    "fuel": "7311",
+    "charging": "7309",
+    "parking": "7600",
+    "rest_area": "7897",
+}
+
+
+def cell_of(lat, lon, cell_deg=CELL_DEG):
+    return int(math.floor(lat / cell_deg)), int(math.floor(lon / cell_deg))
+
+
+def _cells_around(lat, lon, radius_m, cell_deg=CELL_DEG):
+    """All cells overlapping the bounding box of a circle"""
+    dlat = radius_m / METERS_PER_DEG
+    dlon = dlat / max(math.cos(math.radians(lat)), 1e-6)
+    lat0, lon0 = cell_of(lat - dlat, lon - dlon, cell_deg)
+    lat1, lon1 = cell_of(lat + dlat, lon + dlon, cell_deg)
+    return [(i, j) for i in range(lat0, lat1 + 1) for j in range(lon0, lon1 + 1)]
+
+
+def covered_circle(lat, lon, radius_m, results, fetch_limit=FETCH_LIMIT):
+    """The part of a fetched circle that `results` fully describe, or None.
+
+    Fewer than `fetch_limit` results means the circle is complete. A full
+    page is nearest-first and may be truncated, so only the disc out to the
+    farthest returned POI is known to be complete.
+    """
+    if fetch_limit is None or len(results) < fetch_limit:
+        return lat, lon, radius_m
+    lats = [result["position"]["lat"] for result in results]
+    lons = [result["position"]["lon"] for result in results]
+    farthest = float(np.max(haversine(lat, lon, np.array(lats), np.array(lons)))) * 1000
+    return (lat, lon, min(farthest, radius_m)) if farthest > 0 else None
+
+
+def fetch_key(lat, lon, radius_m):
+    """Identity of a fetched circle (~1 m resolution)"""
+    return round(float(lat), 5), round(float(lon), 5), int(radius_m)
+
+
+def distance_to_polyline_m(lats, lons, line):
+    """Distance in metres from each point to the nearest segment of `line`.
+
+    Returns (distances, segment_index). Uses a local equirectangular
+    projection, which is accurate to well under 1% for route-sized areas.
+    """
+    lats = np.asarray(lats, dtype=float)
+    lons = np.asarray(lons, dtype=float)
+    line = np.asarray(line, dtype=float).reshape(-1, 2)
+    if len(line) == 1:
+        line = np.vstack([line, line])
+    kx = METERS_PER_DEG * math.cos(math.radians(float(line[:, 0].mean())))
+    px, py = lons[:, None] * kx, lats[:, None] * METERS_PER_DEG
+    ax, ay = line[:-1, 1] * kx, line[:-1, 0] * METERS_PER_DEG
+    bx, by = line[1:, 1] * kx, line[1:, 0] * METERS_PER_DEG
+    dx, dy = bx - ax, by - ay
+    length2 = np.where(dx * dx + dy * dy > 0, dx * dx + dy * dy, 1.0)
+    t = np.clip(((px - ax) * dx + (py - ay) * dy) / length2, 0.0, 1.0)
+    dist = np.hypot(px - (ax + t * dx), py - (ay + t * dy))
+    nearest = np.argmin(dist, axis=1)
+    return dist[np.arange(len(lats)), nearest], nearest
+
+
+class _Layer:
+    """POIs of one category plus the circles already fetched from the API"""
+
+    def __init__(self):
+        self.results = []
+        self.lat = np.empty(0)
+        self.lon = np.empty(0)
+        self.ids = {}
+        self.cells = defaultdict(list)
+        self.covered = []  # (lat, lon, radius_m, fetched_at)
+        self.truncated = {}  # fetch_key(lat, lon, radius_m) -> fetched_at
+
+
+class POIIndex:
+    """Grid index answering radius, k-nearest and along-polyline POI queries"""
+
+    def __init__(self, cell_deg=CELL_DEG, coverage_ttl=COVERAGE_TTL, truncated_ttl=TRUNCATED_TTL):
+        self.cell_deg = cell_deg
+        self.coverage_ttl = coverage_ttl
+        self.truncated_ttl = truncated_ttl
+        self._layers = defaultdict(_Layer)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return sum(len(layer.results) for layer in self._layers.values())
+
+    def add_results(self, category, results, covered=None):
+        """Add TomTom POI results; `covered` = (lat, lon, radius_m) they fully describe"""
+        with self._lock:
+            layer = self._layers[category]
+            new_lat, new_lon = [], []
+            for result in results:
+                position = result["position"]
+                key = result.get("id") or (result.get("poi", {}).get("name"), round(position["lat"], 5), round(position["lon"], 5))
+                if key in layer.ids:
+                    continue
+                layer.ids[key] = len(layer.results)
+                layer.cells[cell_of(position["lat"], position["lon"], self.cell_deg)].append(len(layer.results))
+                layer.results.append(result)
+                new_lat.append(position["lat"])
+                new_lon.append(position["lon"])
+            if new_lat:
+                layer.lat = np.concatenate([layer.lat, new_lat])
+                layer.lon = np.concatenate([layer.lon, new_lon])
+            if covered is not None:
+                layer.covered.append((*covered, time.time()))
+
+    def add_fetch(self, category, lat, lon, radius_m, results, fetch_limit=FETCH_LIMIT):
+        """Add the results of fetching one circle, recording what they cover"""
+        covered = covered_circle(lat, lon, radius_m, results, fetch_limit)
+        self.add_results(category, results, covered=covered)
+        if covered != (lat, lon, radius_m):
+            with self._lock:
+                self._layers[category].truncated[fetch_key(lat, lon, radius_m)] = time.time()
+
+    def is_covered(self, category, lat, lon, radius_m):
+        """True if a previous fetch already answers the whole query circle"""
+        now = time.time()
+        with self._lock:
+            layer = self._layers[category]
+            key = fetch_key(lat, lon, radius_m)
+            fetched_at = layer.truncated.get(key)
+            if fetched_at is not None:
+                if now - fetched_at < self.truncated_ttl:
+                    return True
+                del layer.truncated[key]
+            layer.covered = [c for c in layer.covered if now - c[3] < self.coverage_ttl]
+            if not layer.covered:
+                return False
+            circles = np.array([c[:3] for c in layer.covered])
+        gap = haversine(lat, lon, circles[:, 0], circles[:, 1]) * 1000 + radius_m
+        return bool((gap <= circles[:, 2]).any())
+
+    def _candidates(self, layer, cells):
+        idx = [i for cell in cells for i in layer.cells.get(cell, ())]
+        return np.array(idx, dtype=int)
+
+    def _with_dist(self, layer, idx, dist):
+        order = np.argsort(dist, kind="stable")
+        return [dict(layer.results[idx[k]], dist=float(dist[k])) for k in order]
+
+    def radius(self, category, lat, lon, radius_m, limit=None):
+        """POIs within `radius_m` of (lat, lon), nearest first"""
+        with self._lock:
+            layer = self._layers[category]
+            idx = self._candidates(layer, _cells_around(lat, lon, radius_m, self.cell_deg))
+            if idx.size == 0:
+                return []
+            dist = haversine(lat, lon, layer.lat[idx], layer.lon[idx]) * 1000
+            keep = dist <= radius_m
+            found = self._with_dist(layer, idx[keep], dist[keep])
+        return found[:limit] if limit else found
+
+    def nearest(self, category, lat, lon, k=5, max_radius_m=50_000):
+        """The k POIs closest to (lat, lon), searching outwards up to `max_radius_m`"""
+        radius_m = self.cell_deg * METERS_PER_DEG
+        while True:
+            found = self.radius(category, lat, lon, radius_m)
+            if len(found) >= k or radius_m >= max_radius_m:
+                return found[:k]
+            radius_m = min(radius_m * 2, max_radius_m)
+
+    def near_polyline(self, category, line, within_m, limit=None):
+        """POIs within `within_m` of the polyline, closest to the road first.
+
+        `dist` is the distance to the polyline; `segment` is the index of the
+        nearest segment so callers can order results along the route.
+        """
+        line = np.asarray(line, dtype=float).reshape(-1, 2)
+        if len(line) == 1:
+            line = np.vstack([line, line])
+        with self._lock:
+            layer = self._layers[category]
+            cells = set()
+            for (lat_a, lon_a), (lat_b, lon_b) in zip(line[:-1], line[1:]):
+                mid_lat, mid_lon = (lat_a + lat_b) / 2, (lon_a + lon_b) / 2
+                half = haversine(lat_a, lon_a, lat_b, lon_b) * 500
+                cells.update(_cells_around(mid_lat, mid_lon, half + within_m, self.cell_deg))
+            idx = self._candidates(layer, cells)
+            if idx.size == 0:
+                return []
+            dist, segment = distance_to_polyline_m(layer.lat[idx], layer.lon[idx], line)
+            keep = dist <= within_m
+            order = np.argsort(dist[keep], kind="stable")
+            idx, dist, segment = idx[keep][order], dist[keep][order], segment[keep][order]
+            found = [dict(layer.results[i], dist=float(d), segment=int(s)) for i, d, s in zip(idx, dist, segment)]
+        return found[:limit] if limit else found
+
+    def query_radius(self, category, lat, lon, radius_m, fetch=None, limit=None, fetch_limit=FETCH_LIMIT):
+        """Radius query that calls `fetch()` (TomTom results) only for cold areas"""
+        if fetch is not None and not self.is_covered(category, lat, lon, radius_m):
+            self.add_fetch(category, lat, lon, radius_m, fetch(), fetch_limit)
+        return self.radius(category, lat, lon, radius_m, limit=limit)
+
+    def load_extract(self, path, covered=None):
+        """Load an offline CSV extract with columns category,name,lat,lon[,address].
+
+        `covered` maps a category to the (lat, lon, radius_m) the extract is
+        complete for, so queries there never reach the API.
+        """
+        by_category = defaultdict(list)
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                by_category[row["category"]].append({
+                    "poi": {"name": row["name"]},
+                    "position": {"lat": float(row["lat"]), "lon": float(row["lon"])},
+                    "address": {"freeformAddress": row.get("address") or ""},
+                })
+        for category, results in by_category.items():
+            self.add_results(category, results, covered=(covered or {}).get(category))
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index():
+    """Process-wide index shared by all sessions"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = POIIndex()
+    return _index
@@ -0,0 +1,76 @@
+"""Shared HTTP client for every external provider (OpenWeatherMap, NewsAPI, TomTom, ...).
+
+Bare `requests.get(url)` opens a new TCP + TLS connection on every call, and
+Streamlit reruns the whole script on every widget change. This module keeps a
+single process-wide session whose connection pools are kept alive per host, so
+repeated calls to the same provider reuse their sockets. Every request also
+gets a default timeout and asks for a gzip-compressed body.
+
+Provider keys travel in query strings (appid=, apiKey=, key=), and requests
+puts the full URL into its exception messages; error_text() is the message to
+show users or API clients instead of str(error).
+"""
+import re
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# (connect, read) seconds used when the caller doesn't pass a timeout
+DEFAULT_TIMEOUT = (3.05, 10)
+
+# Number of per-host pools kept around and connections kept per host
+POOL_HOSTS = 10
+POOL_MAXSIZE = 20
+
+DEFAULT_HEADERS = {
+    "Accept-Encoding": "gzip, deflate",
+    "User-Agent": "logistics-courier-app",
+}
+
+# A URL query string inside an exception message
+_QUERY = re.compile(r"\?[^\s'\")]*")
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _build_session():
+    session = requests.Session()
+    # POOL_MAXSIZE sockets per host are kept alive; a burst beyond that opens
+    # short-lived extra ones. A blocking pool would queue callers with no
+    # timeout (requests has no pool timeout, and the read timeout starts later)
+    adapter = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=POOL_MAXSIZE, pool_block=False)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(DEFAULT_HEADERS)
+    return session
+
+
+def get_session():
+    """Return the process-wide pooled session, creating it on first use"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def get(url, params=None, timeout=None, **kwargs):
+    """GET `url` through the shared pool, applying the default timeout"""
+    return get_session().get(url, params=params, timeout=timeout or DEFAULT_TIMEOUT, **kwargs)
+
+
+def error_text(error):
+    """str(error) without URL query strings, so API keys are not echoed back"""
+    return _QUERY.sub("", str(error))
+
+
+def close():
+    """Close all pooled connections (the next call opens a fresh session)"""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
@@ -0,0 +1,96 @@
+"""Along-route resource search.
+
+"Nearby Resources" used to be searched around the straight-line midpoint of
+start and end, which on long or curved routes can be kilometres off the road.
+corridor_search samples the route polyline at fixed intervals, drops samples
+whose area the POI index already covers (or that fall into the same grid cell
+as an earlier sample), sends the remaining POI queries as one concurrent
+batch, and ranks everything within the corridor by detour: leaving the route
+to a POI and coming back costs about twice its distance to the polyline.
+
+The number of API queries is capped by `max_queries`; on long routes the
+samples are spread further apart (with larger circles) instead of multiplying
+calls.
+"""
+import math
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import poi_index
+from distance_matrix import haversine
+
+SAMPLE_INTERVAL_M = 5000
+CORRIDOR_M = 1000
+MAX_QUERIES = 6
+MAX_RADIUS_M = 50_000  # TomTom poiSearch radius limit
+
+
+def sample_polyline(points, interval_m):
+    """Points every `interval_m` metres along the polyline, ends included"""
+    line = np.asarray(points, dtype=float).reshape(-1, 2)
+    if len(line) < 2:
+        return line
+    seg = haversine(line[:-1, 0], line[:-1, 1], line[1:, 0], line[1:, 1]) * 1000
+    cum = np.concatenate([[0.0], np.cumsum(seg)])
+    total = cum[-1]
+    if total == 0:
+        return line[:1]
+    targets = np.append(np.arange(0.0, total, interval_m), total)
+    return np.column_stack([np.interp(targets, cum, line[:, 0]), np.interp(targets, cum, line[:, 1])])
+
+
+def plan_queries(points, index, category, corridor_m=CORRIDOR_M, interval_m=SAMPLE_INTERVAL_M, max_queries=MAX_QUERIES):
+    """(lat, lon, radius_m) circles that still need an API call to cover the corridor"""
+    line = np.asarray(points, dtype=float).reshape(-1, 2)
+    seg = haversine(line[:-1, 0], line[:-1, 1], line[1:, 0], line[1:, 1]) * 1000 if len(line) > 1 else np.zeros(0)
+    total = float(seg.sum())
+    # Spread the samples out instead of exceeding the query budget
+    if max_queries > 1:
+        interval_m = max(interval_m, total / (max_queries - 1))
+    else:
+        interval_m = max(interval_m, total)
+    # A circle through neighbouring samples that still reaches the corridor edge,
+    # in whole metres as TomTom's radius parameter expects
+    radius_m = int(math.ceil(min(math.hypot(interval_m / 2, corridor_m), MAX_RADIUS_M)))
+
+    queries = []
+    seen_cells = set()
+    for lat, lon in sample_polyline(line, interval_m):
+        cell = poi_index.cell_of(lat, lon, index.cell_deg)
+        if cell in seen_cells or index.is_covered(category, lat, lon, radius_m):
+            continue
+        seen_cells.add(cell)
+        queries.append((float(lat), float(lon), radius_m))
+    return queries[:max_queries]
+
+
+def corridor_search(index, category, points, fetch, corridor_m=CORRIDOR_M,
+                    interval_m=SAMPLE_INTERVAL_M, max_queries=MAX_QUERIES, limit=None):
+    """POIs within `corridor_m` of the route, smallest detour first.
+
+    `fetch(lat, lon, radius_m)` returns TomTom POI results for one circle; it
+    is only called for the circles plan_queries still needs. A circle whose
+    fetch fails is skipped (and stays uncovered); the error is raised only if
+    every circle failed. Each result gets `dist` (metres to the polyline) and
+    `detour_m` (out and back).
+    """
+    queries = plan_queries(points, index, category, corridor_m, interval_m, max_queries)
+    if queries:
+        with ThreadPoolExecutor(max_workers=len(queries)) as executor:
+            futures = [(circle, executor.submit(fetch, *circle)) for circle in queries]
+        errors = []
+        for circle, future in futures:
+            try:
+                results = future.result()
+            except Exception as e:
+                errors.append(e)
+                continue
+            index.add_fetch(category, *circle, results)
+        if len(errors) == len(queries):
+            raise errors[0]
+
+    found = index.near_polyline(category, points, corridor_m)
+    for result in found:
+        result["detour_m"] = 2 * result["dist"]
+    return found[:limit] if limit else found
@@ -0,0 +1,211 @@
+"""Multi-stop route optimizer for a courier's daily manifest.
+
+get_route_with_traffic only routes one start:end pair, so drivers used to
+sequence their stops by hand. optimize_route takes a depot plus N stops and:
+
+1. builds a distance / travel-time matrix between all points,
+2. builds trips with a nearest-neighbour construction that respects vehicle
+   capacity (a new trip starts from the depot when the van is full) and
+   prefers stops it can still reach inside their time window,
+3. improves every trip with 2-opt and Or-opt local search. Candidate moves
+   are scored with NumPy over all positions at once, so 200+ stops take a
+   few seconds at most on one core.
+
+Stops are dicts with `lat`, `lon` and optionally `name`, `demand` (default 1),
+`window` as (earliest, latest) minutes after the shift starts, and `service`
+minutes spent at the stop.
+"""
+import time
+
+import numpy as np
+
+from distance_matrix import haversine_matrix
+
+DEFAULT_SPEED_KMH = 30  # urban average, same as the dashboard ETA
+
+# Minutes of lateness are weighted far above driving time in the construction
+LATE_PENALTY = 1000.0
+EPSILON = 1e-9
+
+
+class _Problem:
+    """Matrices and per-node attributes; node 0 is the depot"""
+
+    def __init__(self, depot, stops, capacity, speed_kmh):
+        points = [depot] + [(stop["lat"], stop["lon"]) for stop in stops]
+        self.dist = haversine_matrix(points)
+        self.time = self.dist / speed_kmh * 60  # minutes
+        n = len(points)
+        self.demand = np.array([0] + [stop.get("demand", 1) for stop in stops], dtype=float)
+        self.service = np.array([0] + [stop.get("service", 0) for stop in stops], dtype=float)
+        self.win_start = np.zeros(n)
+        self.win_end = np.full(n, np.inf)
+        for i, stop in enumerate(stops, start=1):
+            if stop.get("window") is not None:
+                self.win_start[i], self.win_end[i] = stop["window"]
+        self.has_windows = bool(np.isfinite(self.win_end).any() or self.win_start.any())
+        self.capacity = np.inf if capacity is None else float(capacity)
+        if self.demand.max() > self.capacity:
+            raise ValueError("A stop's demand exceeds the vehicle capacity")
+
+    def schedule(self, trips):
+        """Service start minute for every stop and total lateness, trips run back to back"""
+        t = 0.0
+        starts = {}
+        late = 0.0
+        for trip in trips:
+            prev = 0
+            for node in trip:
+                t = max(t + self.time[prev, node], self.win_start[node])
+                late += max(0.0, t - self.win_end[node])
+                starts[node] = t
+                t += self.service[node]
+                prev = node
+            t += self.time[prev, 0]
+        return starts, late
+
+
+def _construct(problem):
+    """Nearest-neighbour trips under capacity, favouring stops that are still on time"""
+    n = len(problem.demand)
+    unvisited = np.ones(n, dtype=bool)
+    unvisited[0] = False
+    trips = []
+    t = 0.0
+    while unvisited.any():
+        trip = []
+        load = 0.0
+        prev = 0
+        while True:
+            cand = np.flatnonzero(unvisited & (load + problem.demand <= problem.capacity))
+            if cand.size == 0:
+                break
+            begin = np.maximum(t + problem.time[prev, cand], problem.win_start[cand])
+            late = np.maximum(0.0, begin - problem.win_end[cand])
+            node = int(cand[np.argmin(begin + late * LATE_PENALTY)])
+            t = max(t + problem.time[prev, node], problem.win_start[node]) + problem.service[node]
+            load += problem.demand[node]
+            unvisited[node] = False
+            trip.append(node)
+            prev = node
+        t += problem.time[prev, 0]
+        trips.append(trip)
+    return trips
+
+
+def _accept(problem, trips, k, candidate, late):
+    """Swap in `candidate` for trip k unless it makes the schedule later"""
+    if not problem.has_windows:
+        trips[k] = candidate
+        return late
+    trial = trips[:k] + [candidate] + trips[k + 1:]
+    _, trial_late = problem.schedule(trial)
+    if trial_late <= late + EPSILON:
+        trips[k] = candidate
+        return trial_late
+    return None
+
+
+def _two_opt(problem, trips, k, late):
+    """Reverse segments of trip k while that shortens it"""
+    d = problem.dist
+    improved = False
+    tour = np.array([0] + trips[k] + [0])
+    m = len(tour)
+    for i in range(1, m - 2):
+        a, b = tour[i - 1], tour[i]
+        js = np.arange(i + 1, m - 1)
+        delta = d[a, tour[js]] + d[b, tour[js + 1]] - d[a, b] - d[tour[js], tour[js + 1]]
+        for j in js[np.argsort(delta)][:5]:
+            if delta[j - i - 1] >= -EPSILON:
+                break
+            candidate = np.concatenate([tour[:i], tour[i:j + 1][::-1], tour[j + 1:]])
+            new_late = _accept(problem, trips, k, candidate[1:-1].tolist(), late)
+            if new_late is not None:
+                late, tour, improved = new_late, candidate, True
+                break
+    return improved, late
+
+
+def _or_opt(problem, trips, k, late):
+    """Move chains of 1-3 stops of trip k to a cheaper position (optionally reversed)"""
+    d = problem.dist
+    improved = False
+    tour = np.array([0] + trips[k] + [0])
+    for length in (1, 2, 3):
+        i = 1
+        while i + length <= len(tour) - 1:
+            seg = tour[i:i + length]
+            prev, nxt = tour[i - 1], tour[i + length]
+            gain = d[prev, seg[0]] + d[seg[-1], nxt] - d[prev, nxt]
+            rest = np.concatenate([tour[:i], tour[i + length:]])
+            left, right = rest[:-1], rest[1:]
+            base = d[left, right]
+            forward = d[left, seg[0]] + d[seg[-1], right] - base - gain
+            backward = d[left, seg[-1]] + d[seg[0], right] - base - gain
+            forward[i - 1] = backward[i - 1] = np.inf  # original position
+            best_fwd, best_bwd = np.argmin(forward), np.argmin(backward)
+            if min(forward[best_fwd], backward[best_bwd]) < -EPSILON:
+                if forward[best_fwd] <= backward[best_bwd]:
+                    p, chain = best_fwd, seg
+                else:
+                    p, chain = best_bwd, seg[::-1]
+                candidate = np.concatenate([rest[:p + 1], chain, rest[p + 1:]])
+                new_late = _accept(problem, trips, k, candidate[1:-1].tolist(), late)
+                if new_late is not None:
+                    late, tour, improved = new_late, candidate, True
+                    continue
+            i += 1
+    return improved, late
+
+
+def _improve(problem, trips, deadline):
+    _, late = problem.schedule(trips)
+    for k in range(len(trips)):
+        while time.monotonic() < deadline:
+            moved_2opt, late = _two_opt(problem, trips, k, late)
+            moved_oropt, late = _or_opt(problem, trips, k, late)
+            if not (moved_2opt or moved_oropt):
+                break
+    return trips
+
+
+def optimize_route(depot, stops, capacity=None, speed_kmh=DEFAULT_SPEED_KMH, time_limit=5.0):
+    """Sequence `stops` from `depot` (lat, lon) and return the ordered legs.
+
+    Returns a dict with `order` (stop indices in visiting order), `trips`
+    (one list of stop indices per depot departure), `legs`, `distance_km`,
+    `duration_min` (driving time) and `late_stops` (indices served after
+    their window).
+    """
+    if not stops:
+        return {"order": [], "trips": [], "legs": [], "distance_km": 0.0, "duration_min": 0.0, "late_stops": []}
+
+    problem = _Problem(depot, stops, capacity, speed_kmh)
+    trips = _construct(problem)
+    trips = _improve(problem, trips, time.monotonic() + time_limit)
+    starts, _ = problem.schedule(trips)
+
+    names = ["Depot"] + [stop.get("name", f"Stop {i + 1}") for i, stop in enumerate(stops)]
+    legs = []
+    for trip in trips:
+        path = [0] + trip + [0]
+        for a, b in zip(path[:-1], path[1:]):
+            legs.append({
+                "from": names[a],
+                "to": names[b],
+                "distance_km": round(float(problem.dist[a, b]), 2),
+                "duration_min": round(float(problem.time[a, b]), 1),
+                "arrival_min": round(float(starts[b]), 1) if b else None,
+            })
+
+    total_km = sum(float(problem.dist[a, b]) for trip in trips for a, b in zip([0] + trip, trip + [0]))
+    late_stops = [node - 1 for node, t in starts.items() if t > problem.win_end[node] + EPSILON]
+    return {
+        "order": [node - 1 for trip in trips for node in trip],
+        "trips": [[node - 1 for node in trip] for trip in trips],
+        "legs": legs,
+        "distance_km": round(total_km, 2),
+        "duration_min": round(sum(leg["duration_min"] for leg in legs), 1),
+        "late_stops": sorted(late_stops),
+    }
@@ -0,0 +1,147 @@
+"""Process-wide provider caches, one per data source, behind one decorator.
+
+Streamlit reruns the whole script on every keystroke, and none of the apps
+cached their provider calls, so each session refetched weather and routes on
+its own. Functions decorated with @cached(source) share one
+TTLCache per source across all sessions of the server process:
+
+- each source has its own TTL (CACHE_TTL_<SOURCE> overrides the default) and
+  byte budget (CACHE_MAX_BYTES_<SOURCE>), with least recently used entries
+  evicted first,
+- expired entries are served while one caller refreshes them, for
+  SOURCE_STALE_TTLS seconds (default: one more TTL); routes carry live
+  traffic and are never served stale,
+- concurrent misses for the same key are single-flight: one caller loads,
+  the others wait and read its result, so 100 couriers asking for the same
+  city cost one upstream call,
+- `cache_if` keeps error answers out of the cache.
+
+Entry sizes are estimated from their pickled length. News, geocodes and POIs
+have their own caches (news_cache, geocode_store, poi_index) and are not
+cached here.
+"""
+import functools
+import os
+import pickle
+import sys
+import threading
+
+from ttl_cache import TTLCache
+
+SOURCE_TTLS = {
+    "weather": int(os.getenv("WEATHER_CACHE_TTL", "600")),
+    "route": 300,
+}
+# Seconds an expired entry may still be served while it refreshes
+SOURCE_STALE_TTLS = {
+    "route": 0,
+}
+SOURCE_MAX_BYTES = {
+    "weather": 4 * 1024 * 1024,
+    "route": 32 * 1024 * 1024,
+}
+DEFAULT_TTL = 600
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+MAX_ENTRIES = 100_000
+
+_caches = {}
+_key_locks = {}
+_lock = threading.Lock()
+
+
+def approx_size(value):
+    """Bytes a cached value accounts for"""
+    try:
+        return len(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return sys.getsizeof(value)
+
+
+def get_cache(source):
+    """The shared TTLCache for `source`, created on first use"""
+    cache = _caches.get(source)
+    if cache is None:
+        with _lock:
+            cache = _caches.get(source)
+            if cache is None:
+                env = source.upper()
+                cache = _caches[source] = TTLCache(
+                    ttl=int(os.getenv(f"CACHE_TTL_{env}", SOURCE_TTLS.get(source, DEFAULT_TTL))),
+                    max_entries=MAX_ENTRIES,
+                    stale_ttl=SOURCE_STALE_TTLS.get(source),
+                    max_bytes=int(os.getenv(f"CACHE_MAX_BYTES_{env}", SOURCE_MAX_BYTES.get(source, DEFAULT_MAX_BYTES))),
+                    sizeof=approx_size,
+                )
+    return cache
+
+
+def _freeze(value):
+    """Hashable form of call arguments (lists/dicts become tuples)"""
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, str):
+        return " ".join(value.split())
+    return value
+
+
+def _key_lock(source, key):
+    with _lock:
+        lock = _key_locks.get((source, key))
+        if lock is None:
+            lock = _key_locks[(source, key)] = threading.Lock()
+        return lock
+
+
+def cached(source, key=None, cache_if=None):
+    """Cache a provider function's results in the shared `source` cache.
+
+    `key(*args, **kwargs)` builds the cache key (default: the arguments with
+    whitespace-normalized strings). The wrapper gains `is_cached(*args,
+    **kwargs)`, to skip spinners on hits, and `uncached` for the original.
+    """
+    def decorate(fn):
+        name = f"{fn.__module__}.{fn.__qualname__}"
+
+        def make_key(args, kwargs):
+            return name, key(*args, **kwargs) if key else _freeze((args, kwargs))
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            cache = get_cache(source)
+            k = make_key(args, kwargs)
+            load = lambda: fn(*args, **kwargs)
+            if cache.contains(k):
+                return cache.get(k, load, cache_if)
+            lock = _key_lock(source, k)
+            with lock:
+                try:
+                    # Whoever held the lock before us has usually filled the entry
+                    return cache.get(k, load, cache_if)
+                finally:
+                    with _lock:
+                        if _key_locks.get((source, k)) is lock:
+                            del _key_locks[(source, k)]
+
+        wrapper.is_cached = lambda *args, **kwargs: get_cache(source).contains(make_key(args, kwargs))
+        wrapper.uncached = fn
+        return wrapper
+    return decorate
+
+
+def stats():
+    """{source: {"entries", "bytes", "hits", "misses"}} for every cache in use"""
+    with _lock:
+        caches = dict(_caches)
+    return {
+        source: {"entries": len(cache), "bytes": cache.bytes, "hits": cache.hits, "misses": cache.misses}
+        for source, cache in caches.items()
+    }
+
+
+def clear(source=None):
+    with _lock:
+        caches = [_caches[source]] if source in _caches else ([] if source else list(_caches.values()))
+    for cache in caches:
+        cache.invalidate()
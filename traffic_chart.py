@@ -0,0 +1,72 @@
+"""Traffic chart specs built once per city and day.
+
+get_traffic_analysis and create_traffic_chart built a line, a point and a
+current-hour layer from the same DataFrame on every rerun, and Altair
+serialized that data into the Vega-Lite spec each time. Here the layered chart
+is compiled to a Vega-Lite dict once per (city, date, style): the data is
+attached to the layer chart, so it is stored once as a named dataset that all
+three layers read. The current hour is a Vega-Lite param used by the
+highlight layer's filter, so a rerun only copies the top-level dict and swaps
+the param value. Render the result with st.vega_lite_chart.
+"""
+from datetime import date, datetime
+from functools import lru_cache
+
+import lazy_imports
+import traffic_sim
+
+# Only needed when a chart is first built for a city and day
+alt = lazy_imports.lazy("altair")
+pd = lazy_imports.lazy("pandas")
+
+CURRENT_HOUR = "current_hour"
+TEMPLATE_CACHE_SIZE = 256
+
+
+def traffic_frame(city, day=None):
+    """Hourly simulated traffic for `city` on `day` as Hour/Traffic/TimeOfDay columns"""
+    traffic = traffic_sim.simulated_traffic(city, day)
+    hours = range(len(traffic))
+    return pd.DataFrame({
+        'Hour': hours,
+        'Traffic': traffic,
+        'TimeOfDay': [f"{h:02d}:00" for h in hours],
+    })
+
+
+@lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def _template(city, day, title, width, height, title_size, point_size, highlight_size, y_title, y_format):
+    hour = alt.param(name=CURRENT_HOUR, value=0)
+    line = alt.Chart().mark_line(color='blue', strokeWidth=3).encode(
+        x=alt.X('Hour:Q', axis=alt.Axis(title='Hour of Day', labelAngle=0, values=list(range(0, 24, 2)))),
+        y=alt.Y('Traffic:Q', axis=alt.Axis(title=y_title, format=y_format), scale=alt.Scale(domain=[0, 1])),
+        tooltip=['TimeOfDay', 'Traffic']
+    )
+    points = alt.Chart().mark_circle(color='blue', size=point_size).encode(
+        x='Hour:Q', y='Traffic:Q', tooltip=['TimeOfDay', 'Traffic']
+    )
+    current_point = alt.Chart().mark_circle(color='red', size=highlight_size).encode(
+        x='Hour:Q', y='Traffic:Q', tooltip=['TimeOfDay', alt.Tooltip('Traffic', title='Current Traffic')]
+    ).transform_filter(alt.datum.Hour == hour)
+
+    chart = alt.layer(line, points, current_point, data=traffic_frame(city, day)).add_params(hour).properties(
+        title=title, width=width, height=height
+    ).configure_title(fontSize=title_size)
+    return chart.to_dict()
+
+
+def traffic_chart_spec(city, current_hour=None, day=None, title=None, width=600, height=300,
+                       title_size=20, point_size=100, highlight_size=150, y_title='Traffic Intensity',
+                       y_format='%'):
+    """Vega-Lite spec of the day's traffic curve with `current_hour` highlighted.
+
+    The returned dict shares its layers and datasets with the cached template,
+    so treat it as read-only.
+    """
+    if current_hour is None:
+        current_hour = datetime.now().hour
+    template = _template(city, day or date.today(), title or f'Traffic Pattern Analysis for {city}',
+                         width, height, title_size, point_size, highlight_size, y_title, y_format)
+    spec = dict(template)
+    spec['params'] = [{'name': CURRENT_HOUR, 'value': int(current_hour)}]
+    return spec
@@ -0,0 +1,137 @@
+"""Traffic-profile engine: daily traffic curves and optimal delivery windows.
+
+generate_traffic_data used to rebuild the city lists on every call and walk
+the low-traffic hours one DataFrame row at a time. Here the curves are plain
+NumPy arrays (one row per city or zone) and the windows are found with
+run-length encoding over the whole matrix at once, so thousands of zones are
+processed in one call. Curves can be resampled from hourly to 5/15/30-minute
+bins, and windows are reported at that resolution.
+"""
+import numpy as np
+
+BINS_PER_DAY_HOURLY = 24
+
+BIG_CITIES = frozenset(c.lower() for c in ["Barcelona", "Madrid", "Valencia", "Bilbao", "Sevilla"])
+MEDIUM_CITIES = frozenset(c.lower() for c in ["Zaragoza", "Málaga", "Murcia", "Mallorca", "Alicante"])
+
+# Hourly relative traffic (00:00-23:00) per city tier: morning peak, day, evening peak
+TIER_PATTERNS = np.array([
+    # big
+    [0.3, 0.4, 0.5, 0.7, 1.0, 1.5, 1.8, 2.0, 1.7,
+     1.5, 1.3, 1.4, 1.6, 1.5, 1.4, 1.3, 1.5,
+     1.7, 1.9, 1.8, 1.5, 1.3, 1.0, 0.7],
+    # medium
+    [0.2, 0.3, 0.4, 0.6, 0.9, 1.3, 1.6, 1.8, 1.5,
+     1.3, 1.1, 1.2, 1.4, 1.3, 1.2, 1.1, 1.3,
+     1.5, 1.7, 1.6, 1.3, 1.1, 0.8, 0.5],
+    # small / default
+    [0.1, 0.2, 0.3, 0.5, 0.7, 1.0, 1.2, 1.3, 1.1,
+     1.0, 0.9, 1.0, 1.1, 1.0, 0.9, 0.8, 1.0,
+     1.2, 1.4, 1.3, 1.1, 0.9, 0.6, 0.3],
+])
+BIG, MEDIUM, SMALL = 0, 1, 2
+
+# Traffic level (0-10 scale) under which an hour counts as a good delivery window
+WINDOW_THRESHOLD = 5.0
+# Used when no bin is under the threshold: the quietest quarter of the day
+FALLBACK_QUANTILE = 0.25
+
+
+def city_tier(city):
+    name = city.strip().lower()
+    if name in BIG_CITIES:
+        return BIG
+    if name in MEDIUM_CITIES:
+        return MEDIUM
+    return SMALL
+
+
+def tier_profiles(cities):
+    """Hourly base curves, one row per city"""
+    return TIER_PATTERNS[[city_tier(city) for city in cities]]
+
+
+def scale_to_ten(levels):
+    """Scale each row so its peak is 10, rounded to one decimal"""
+    levels = np.asarray(levels, dtype=float)
+    return np.round(levels / levels.max(axis=-1, keepdims=True) * 10, 1)
+
+
+def resample(levels, bin_minutes):
+    """Resample hourly curves (..., 24) to `bin_minutes` bins by periodic interpolation"""
+    levels = np.asarray(levels, dtype=float)
+    if bin_minutes == 60:
+        return levels
+    if 60 % bin_minutes:
+        raise ValueError("bin_minutes must divide 60")
+    # Append hour 24 (= hour 0) so the last bins interpolate towards midnight
+    wrapped = np.concatenate([levels, levels[..., :1]], axis=-1)
+    targets = np.arange(0, BINS_PER_DAY_HOURLY, bin_minutes / 60)
+    lo = np.floor(targets).astype(int)
+    frac = targets - lo
+    return wrapped[..., lo] * (1 - frac) + wrapped[..., lo + 1] * frac
+
+
+def low_traffic_mask(levels, threshold=WINDOW_THRESHOLD, fallback_quantile=FALLBACK_QUANTILE):
+    """Bins under `threshold`; rows with none fall back to their quietest quantile"""
+    levels = np.atleast_2d(np.asarray(levels, dtype=float))
+    mask = levels < threshold
+    empty = ~mask.any(axis=1)
+    if empty.any():
+        cutoff = np.quantile(levels[empty], fallback_quantile, axis=1, keepdims=True)
+        mask[empty] = levels[empty] <= cutoff
+    return mask
+
+
+def find_runs(mask):
+    """Run-length encode a boolean (zones x bins) matrix.
+
+    Returns three arrays: zone index, first bin and last bin (inclusive) of
+    every run of True values, ordered by zone then time.
+    """
+    mask = np.atleast_2d(np.asarray(mask, dtype=bool))
+    zones, bins = mask.shape
+    padded = np.zeros((zones, bins + 2), dtype=np.int8)
+    padded[:, 1:-1] = mask
+    edges = np.diff(padded, axis=1)
+    start_zone, start_bin = np.nonzero(edges == 1)
+    _, end_bin = np.nonzero(edges == -1)
+    return start_zone, start_bin, end_bin - 1
+
+
+def format_bin(index, bin_minutes=60):
+    minutes = int(index) * bin_minutes
+    return f"{minutes // 60}:{minutes % 60:02d}"
+
+
+def format_windows(starts, ends, bin_minutes=60):
+    """['0:00-4:00', '23:00'] style labels; a window is labelled by its first and last bin"""
+    return [
+        format_bin(s, bin_minutes) if s == e else f"{format_bin(s, bin_minutes)}-{format_bin(e, bin_minutes)}"
+        for s, e in zip(starts, ends)
+    ]
+
+
+def optimal_windows(levels, bin_minutes=60, threshold=WINDOW_THRESHOLD):
+    """Delivery windows for every row of `levels` (zones x bins), as label lists"""
+    levels = np.atleast_2d(levels)
+    zone, start, end = find_runs(low_traffic_mask(levels, threshold))
+    # Runs come out grouped by zone, so split instead of looping per run
+    split_at = np.searchsorted(zone, np.arange(1, levels.shape[0]))
+    return [
+        format_windows(s, e, bin_minutes)
+        for s, e in zip(np.split(start, split_at), np.split(end, split_at))
+    ]
+
+
+def batch_windows(cities, bin_minutes=60, threshold=WINDOW_THRESHOLD, noise=None):
+    """Traffic curves (0-10) and optimal windows for many cities in one array pass.
+
+    `noise`, if given, is a (len(cities), 24) array of multiplicative factors
+    applied to the hourly base curves before scaling.
+    """
+    levels = tier_profiles(cities)
+    if noise is not None:
+        levels = levels * noise
+    levels = scale_to_ten(resample(levels, bin_minutes))
+    return levels, optimal_windows(levels, bin_minutes, threshold)
@@ -0,0 +1,67 @@
+"""Deterministic traffic simulation seeded per city, date and time bin.
+
+The charts used to reseed the global RNG with `now() % 100` on every rerun,
+which made the curve jump between reruns, made it impossible to cache, and
+reset the random state under every other session. Here each time bin gets its
+own numpy.random.Generator seeded from (city, date, bin), so a curve is the
+same all day and across processes. Generated curves are memoized per
+(city, date) and returned as read-only arrays.
+"""
+import hashlib
+from datetime import date
+from functools import lru_cache
+
+import numpy as np
+
+import traffic_store
+from weather_cache import normalize_city
+
+SIM_CACHE_SIZE = 1024
+# Maximum spread of the simulated daily variation around the typical curve
+TRAFFIC_JITTER = 0.2
+
+
+def city_seed(city):
+    """Stable 64-bit seed for a city name (hash() is salted per process)"""
+    digest = hashlib.sha256(normalize_city(city).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "little")
+
+
+def generator(city, day, time_bin):
+    """Independent Generator for one city, date and time-of-day bin"""
+    return np.random.default_rng([city_seed(city), day.toordinal(), time_bin])
+
+
+@lru_cache(maxsize=SIM_CACHE_SIZE)
+def _draws(key, day, bins, kind):
+    values = np.array([getattr(generator(key, day, b), kind)() for b in range(bins)])
+    values.flags.writeable = False
+    return values
+
+
+def uniform(city, day=None, bins=24):
+    """One U[0, 1) draw per time bin"""
+    return _draws(normalize_city(city), day or date.today(), bins, "random")
+
+
+def normal(city, day=None, bins=24):
+    """One standard normal draw per time bin"""
+    return _draws(normalize_city(city), day or date.today(), bins, "standard_normal")
+
+
+@lru_cache(maxsize=SIM_CACHE_SIZE)
+def _simulated_traffic(key, day, jitter):
+    base = traffic_store.get_store().hourly(key, day.weekday())
+    curve = np.clip(base + (uniform(key, day, len(base)) - 0.5) * jitter, 0, 1)
+    curve.flags.writeable = False
+    return curve
+
+
+def simulated_traffic(city, day=None, jitter=TRAFFIC_JITTER):
+    """Hourly traffic (0-1) for `city` on `day`: the typical curve plus daily variation"""
+    return _simulated_traffic(normalize_city(city), day or date.today(), jitter)
+
+
+def clear():
+    _draws.cache_clear()
+    _simulated_traffic.cache_clear()
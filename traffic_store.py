@@ -0,0 +1,182 @@
+"""Precomputed traffic profiles, memory-mapped from disk.
+
+The apps used to rebuild the same hourly traffic list inside every chart call.
+Here all curves live in one float32 array of shape (cities, 7 weekdays, bins)
+saved as a .npy file and opened with mmap_mode="r", so a process maps it once
+and a lookup is a dict access plus an array index that returns a read-only
+view (no copy). Row "*" holds the generic urban curve used for any city without
+its own data. Historical observations (city, timestamp, traffic) are averaged
+per city, weekday and bin by load_observations() and written to the same store;
+`python traffic_store.py observations.csv` does this from the command line.
+"""
+import argparse
+import os
+import threading
+
+import numpy as np
+
+import lazy_imports
+from traffic_profile import resample
+from weather_cache import normalize_city
+
+# Only needed to ingest observations
+pd = lazy_imports.lazy("pandas")
+
+TRAFFIC_STORE_DIR = os.getenv(
+    "TRAFFIC_STORE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "traffic_store")
+)
+LEVELS_FILE = "levels.npy"
+CITIES_FILE = "cities.npy"
+
+DEFAULT_KEY = "*"
+WEEKDAYS = 7
+
+# Typical urban traffic, 0-1: morning rush (7-10), lunch (12-14), evening rush (16-19)
+URBAN_PROFILE = np.array([
+    0.2, 0.1, 0.1, 0.1, 0.2, 0.4, 0.6, 0.9, 1.0, 0.8,  # 0-9
+    0.6, 0.5, 0.7, 0.7, 0.5, 0.6, 0.8, 1.0, 0.9, 0.7,  # 10-19
+    0.5, 0.4, 0.3, 0.2,                                # 20-23
+], dtype=np.float32)
+
+
+def default_levels(bin_minutes=60):
+    """The urban curve at `bin_minutes` resolution, repeated for every weekday"""
+    curve = resample(URBAN_PROFILE, bin_minutes).astype(np.float32)
+    return np.repeat(curve[np.newaxis, :], WEEKDAYS, axis=0)
+
+
+def aggregate_observations(observations, bin_minutes=60):
+    """Mean traffic per (city, weekday, bin) from a city/timestamp/traffic table.
+
+    Returns the city keys, the (cities, 7, bins) means and the matching counts;
+    cells without observations have a count of 0.
+    """
+    if 60 % bin_minutes:
+        raise ValueError("bin_minutes must divide 60")
+    observations = observations.dropna(subset=["city", "timestamp", "traffic"])
+    codes, cities = pd.factorize(observations["city"].astype(str).map(normalize_city))
+    stamps = pd.to_datetime(observations["timestamp"])
+    weekday = stamps.dt.weekday.to_numpy()
+    bins = ((stamps.dt.hour * 60 + stamps.dt.minute) // bin_minutes).to_numpy()
+    values = np.clip(observations["traffic"].to_numpy(dtype=np.float64), 0, 1)
+
+    shape = (len(cities), WEEKDAYS, 24 * 60 // bin_minutes)
+    sums = np.zeros(shape)
+    counts = np.zeros(shape, dtype=np.int64)
+    np.add.at(sums, (codes, weekday, bins), values)
+    np.add.at(counts, (codes, weekday, bins), 1)
+    with np.errstate(invalid="ignore"):
+        means = sums / counts
+    return list(cities), means.astype(np.float32), counts
+
+
+def write_store(path, cities, levels):
+    """Write a store atomically (each file is replaced in one step)"""
+    os.makedirs(path, exist_ok=True)
+    for name, array in ((LEVELS_FILE, np.asarray(levels, dtype=np.float32)),
+                        (CITIES_FILE, np.asarray(cities, dtype=str))):
+        target = os.path.join(path, name)
+        with open(target + ".tmp", "wb") as f:
+            np.save(f, array)
+        os.replace(target + ".tmp", target)
+
+
+class TrafficStore:
+    """Read-only traffic curves per city, weekday and time-of-day bin"""
+
+    def __init__(self, path=TRAFFIC_STORE_DIR):
+        self.path = path
+        if not os.path.exists(os.path.join(path, LEVELS_FILE)):
+            write_store(path, [DEFAULT_KEY], default_levels()[np.newaxis])
+        self._open()
+
+    def _open(self):
+        self.levels = np.load(os.path.join(self.path, LEVELS_FILE), mmap_mode="r")
+        cities = np.load(os.path.join(self.path, CITIES_FILE)).tolist()
+        self.cities = cities
+        self.bin_minutes = 24 * 60 // self.levels.shape[-1]
+        self._rows = {city: i for i, city in enumerate(cities)}
+        self._default = self._rows[DEFAULT_KEY]
+
+    def __contains__(self, city):
+        return normalize_city(city) in self._rows
+
+    def row(self, city):
+        return self._rows.get(normalize_city(city), self._default)
+
+    def profile(self, city, weekday):
+        """Curve for one day (view of the mapped array, one value per bin)"""
+        return self.levels[self.row(city), weekday]
+
+    def hourly(self, city, weekday):
+        """Curve for one day sampled on the hour (24 values, still a view)"""
+        return self.profile(city, weekday)[:: 60 // self.bin_minutes]
+
+    def level(self, city, when):
+        """Traffic level for `city` at datetime `when`"""
+        index = (when.hour * 60 + when.minute) // self.bin_minutes
+        return float(self.levels[self.row(city), when.weekday(), index])
+
+    def load_observations(self, observations, bin_minutes=None):
+        """Fold historical observations into the store and remap it.
+
+        Cells with observations are replaced by their mean; the rest keep their
+        current values (or the urban curve for new cities). Changing
+        `bin_minutes` rebuilds the store at that resolution from the urban curve.
+        """
+        bin_minutes = bin_minutes or self.bin_minutes
+        cities, means, counts = aggregate_observations(observations, bin_minutes)
+
+        if bin_minutes == self.bin_minutes:
+            known = list(self.cities)
+            levels = np.array(self.levels)
+        else:
+            known = [DEFAULT_KEY]
+            levels = default_levels(bin_minutes)[np.newaxis]
+        rows = {city: i for i, city in enumerate(known)}
+        new = [city for city in cities if city not in rows]
+        if new:
+            levels = np.concatenate(
+                [levels, np.repeat(levels[rows[DEFAULT_KEY]][np.newaxis], len(new), axis=0)]
+            )
+            rows.update((city, len(known) + i) for i, city in enumerate(new))
+            known += new
+
+        target = levels[[rows[city] for city in cities]]
+        observed = counts > 0
+        target[observed] = means[observed]
+        levels[[rows[city] for city in cities]] = target
+
+        write_store(self.path, known, levels)
+        self._open()
+        return int(observed.sum())
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Process-wide store, mapped on first use"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = TrafficStore()
+    return _store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load historical traffic observations into the profile store")
+    parser.add_argument("observations", help="CSV with city, timestamp and traffic (0-1) columns")
+    parser.add_argument("--bin-minutes", type=int, default=None, help="time-of-day resolution (divides 60)")
+    parser.add_argument("--store", default=TRAFFIC_STORE_DIR)
+    args = parser.parse_args()
+
+    store = TrafficStore(args.store)
+    cells = store.load_observations(pd.read_csv(args.observations), args.bin_minutes)
+    print(f"Updated {cells} cells; store holds {len(store.cities)} profiles at {store.bin_minutes}-minute bins")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,12 @@
 
 import streamlit as st
-import pandas as pd
-import altair as alt
-import requests
-import random
-from geopy.geocoders import Nominatim
-from geopy.distance import distance as geodistance
-import folium
-from datetime import datetime
+import provider_client
+import lazy_imports
+# Map and geocoding libraries load when the route section first needs them
+folium = lazy_imports.lazy("folium")
+Nominatim = lazy_imports.lazy_attr("geopy.geocoders", "Nominatim")
+geodistance = lazy_imports.lazy_attr("geopy.distance", "distance")
+import traffic_chart
 
 # Page config
 st.set_page_config(page_title="Delivery Dashboard", layout="wide")
@@ -33,7 +32,7 @@ if city:
                 f"https://api.openweathermap.org/data/2.5/weather?"
                 f"q={city}&appid={openweather_api_key}&units=metric&lang=en"
             )
-            response = requests.get(weather_url)
+            response = provider_client.get(weather_url)
             weather_data = response.json()
             if response.status_code == 200 and weather_data.get("main"):
                 temp = weather_data["main"]["temp"]
@@ -70,7 +69,7 @@ if city:
                 f"https://newsapi.org/v2/everything?"
                 f"q={city}&language=en&pageSize=5&apiKey={news_api_key}"
             )
-            r = requests.get(news_url)
+            r = provider_client.get(news_url)
             news = r.json()
             if news.get("status") == "ok":
                 articles = news.get("articles", [])
@@ -142,39 +141,13 @@ else:
 # --- Simulated Traffic Chart ---
 st.header("📈 Simulated Traffic Chart")
 def create_traffic_chart(city):
-    hours = list(range(24))
-    base_traffic = [
-        0.2, 0.1, 0.1, 0.1, 0.2, 0.4, 0.6, 0.9, 1.0, 0.8,
-        0.6, 0.5, 0.7, 0.7, 0.5, 0.6, 0.8, 1.0, 0.9, 0.7,
-        0.5, 0.4, 0.3, 0.2
-    ]
-    random.seed(int(datetime.now().timestamp()) % 100)
-    traffic = [max(0, min(1, t + (random.random() - 0.5) * 0.2)) for t in base_traffic]
-    current_hour = datetime.now().hour
-    df = pd.DataFrame({
-        'Hour': hours,
-        'Traffic': traffic,
-        'TimeLabel': [f"{h:02d}:00" for h in hours],
-        'Now': [h == current_hour for h in hours]
-    })
-    chart = alt.Chart(df).mark_line(color='blue', strokeWidth=3).encode(
-        x=alt.X('Hour:Q', axis=alt.Axis(title='Hour of Day', values=list(range(0, 24, 2)))),
-        y=alt.Y('Traffic:Q', axis=alt.Axis(title='Traffic Level', format='.0%'), scale=alt.Scale(domain=[0, 1])),
-        tooltip=['TimeLabel', 'Traffic']
+    return traffic_chart.traffic_chart_spec(
+        city, title=f"Estimated Traffic for {city.capitalize()}", width=700, height=400,
+        title_size=18, point_size=60, highlight_size=100, y_title='Traffic Level', y_format='.0%'
     )
-    dots = alt.Chart(df).mark_circle(color='blue', size=60).encode(
-        x='Hour:Q', y='Traffic:Q', tooltip=['TimeLabel', 'Traffic']
-    )
-    now_dot = alt.Chart(df[df['Now']]).mark_circle(color='red', size=100).encode(
-        x='Hour:Q', y='Traffic:Q', tooltip=['TimeLabel', alt.Tooltip('Traffic', title='Current')]
-    )
-    return (chart + dots + now_dot).properties(
-        title=f"Estimated Traffic for {city.capitalize()}",
-        width=700, height=400
-    ).configure_title(fontSize=18)
 
 if city:
-    traffic_chart = create_traffic_chart(city)
-    st.altair_chart(traffic_chart, use_container_width=True)
+    traffic_spec = create_traffic_chart(city)
+    st.vega_lite_chart(traffic_spec, use_container_width=True)
 else:
     st.info("Enter city to display traffic chart.")
@@ -1,70 +1,33 @@
 
 import streamlit as st
-import pandas as pd
-import altair as alt
-import requests
-import random
-from geopy.geocoders import Nominatim
-from geopy.distance import distance as geodistance
-import folium
-from datetime import datetime
-
-# Functions from original script
-def get_weather(city, api_key):
-    """Get weather information for a city"""
-    with st.spinner(f"Fetching weather data for {city}..."):
-        api_key = api_key.strip()
-        url = f"https://api.openweathermap.org/data/2.5/weather?q={city}&appid={api_key}&units=metric"
+import provider_client
+import shared_cache
+import geocode_store
+import news_cache
+from geocode_store import location_to_point
+import map_cache
+import traffic_chart
+import lazy_imports
+
+# Map and geocoding libraries load when the route section first needs them
+folium = lazy_imports.lazy("folium")
+Nominatim = lazy_imports.lazy_attr("geopy.geocoders", "Nominatim")
+geodistance = lazy_imports.lazy_attr("geopy.distance", "distance")
+
+@shared_cache.cached("weather", cache_if=lambda result: result[0] == 200)
+def fetch_current_weather(city, api_key):
+    """(status code, OpenWeatherMap payload) for a city, shared by all sessions"""
+    weather_url = (
+        f"https://api.openweathermap.org/data/2.5/weather?"
+        f"q={city}&appid={api_key}&units=metric&lang=en"
+    )
+    response = provider_client.get(weather_url)
+    return response.status_code, response.json()
 
-        try:
-            response = requests.get(url, timeout=10)
-
-            if response.status_code == 200:
-                data = response.json()
-                weather = data["weather"][0]["description"].capitalize()
-                temp = data["main"]["temp"]
-                icon = data["weather"][0]["icon"]
-                humidity = data["main"]["humidity"]
-                wind_speed = data["wind"]["speed"]
-
-                # Get coordinates for map
-                lat = data["coord"]["lat"]
-                lon = data["coord"]["lon"]
-
-                weather_details = {
-                    "description": weather,
-                    "temp": temp,
-                    "icon": icon,
-                    "humidity": humidity,
-                    "wind_speed": wind_speed,
-                    "lat": lat,
-                    "lon": lon
-                }
-
-                return True, weather_details
-            elif response.status_code == 401:
-                return False, "API key error. Please check your OpenWeatherMap API key."
-            elif response.status_code == 404:
-                return False, f"City '{city}' not found. Please check spelling."
-
-            return False, f"Weather API error (Status: {response.status_code})"
-
-        except requests.exceptions.RequestException as e:
-            return False, f"Network error while fetching weather data: {str(e)}"
-
-def find_gas_stations(lat, lon):
-    """Find gas stations near the specified location"""
-    now = datetime.now().hour
-
-    # Simple time-based patterns
-    if 7 <= now <= 10:  # Morning commute
-        return "High", f"5+ gas stations open within 3km radius", "🟢"
-    elif 17 <= now <= 20:  # Evening commute
-        return "Medium", f"3-4 gas stations open within 3km radius", "🟡"
-    elif 22 <= now <= 6:  # Late night
-        return "Low", f"Limited gas stations open for 24h service", "🔴"
-    else:
-        return "Medium", "Normal gas station operations in your area", "🟡"
+def geocode_query(query):
+    """(lat, lon) for an address; the on-disk geocode store first, then Nominatim"""
+    geolocator = Nominatim(user_agent="delivery_app")
+    return geocode_store.geocode(query, "nominatim", lambda: location_to_point(geolocator.geocode(query)))
 
 # Page config
 st.set_page_config(page_title="Delivery Dashboard", layout="wide")
@@ -86,13 +49,8 @@ st.header("🌤️ Current Weather")
 if city:
     if openweather_api_key:
         try:
-            weather_url = (
-                f"https://api.openweathermap.org/data/2.5/weather?"
-                f"q={city}&appid={openweather_api_key}&units=metric&lang=en"
-            )
-            response = requests.get(weather_url)
-            weather_data = response.json()
-            if response.status_code == 200 and weather_data.get("main"):
+            status_code, weather_data = fetch_current_weather(city, openweather_api_key)
+            if status_code == 200 and weather_data.get("main"):
                 temp = weather_data["main"]["temp"]
                 description = weather_data["weather"][0]["description"].capitalize()
                 st.subheader(f"Weather in {city.capitalize()}")
@@ -123,25 +81,19 @@ st.header("📰 Local News")
 if city:
     if news_api_key:
         try:
-            news_url = (
-                f"https://newsapi.org/v2/everything?"
-                f"q={city}&language=en&pageSize=5&apiKey={news_api_key}"
-            )
-            r = requests.get(news_url)
-            news = r.json()
-            if news.get("status") == "ok":
-                articles = news.get("articles", [])
-                if articles:
-                    st.subheader(f"Top News in {city.capitalize()}")
-                    for art in articles:
-                        title = art.get("title", "")
-                        source = art.get("source", {}).get("name", "")
-                        url = art.get("url", "")
-                        st.markdown(f"- [{title}]({url}) - *{source}*")
-                else:
-                    st.write("No news found.")
+            # Shared NewsAPI cache, refreshed at most once per NEWS_QUERY_TTL
+            articles = news_cache.search_articles(city, news_api_key)
+            if articles:
+                st.subheader(f"Top News in {city.capitalize()}")
+                for art in articles:
+                    title = art.get("title", "")
+                    source = art.get("source", {}).get("name", "")
+                    url = art.get("url", "")
+                    st.markdown(f"- [{title}]({url}) - *{source}*")
             else:
-                st.error("News API error.")
+                st.write("No news found.")
+        except news_cache.NewsAPIError:
+            st.error("News API error.")
         except Exception:
             st.error("Error connecting to NewsAPI.")
     else:
@@ -152,31 +104,37 @@ else:
 # --- Map Route and Estimated Time ---
 st.header("🗺️ Route Map")
 if start_address and end_address:
-    geolocator = Nominatim(user_agent="delivery_app")
     try:
         query_start = f"{start_address}, {city}" if city else start_address
         query_end = f"{end_address}, {city}" if city else end_address
-        loc_start = geolocator.geocode(query_start)
-        loc_end = geolocator.geocode(query_end)
+        loc_start = geocode_query(query_start)
+        loc_end = geocode_query(query_end)
     except Exception:
         loc_start = None
         loc_end = None
 
     if loc_start and loc_end:
-        lat1, lon1 = loc_start.latitude, loc_start.longitude
-        lat2, lon2 = loc_end.latitude, loc_end.longitude
-        map_route = folium.Map(location=[(lat1+lat2)/2, (lon1+lon2)/2], zoom_start=13)
-        folium.Marker(
-            [lat1, lon1], popup="Start",
-            icon=folium.Icon(color='green', icon='glyphicon-home')
-        ).add_to(map_route)
-        folium.Marker(
-            [lat2, lon2], popup="Destination",
-            icon=folium.Icon(color='red', icon='glyphicon-flag')
-        ).add_to(map_route)
-        folium.PolyLine([[lat1, lon1], [lat2, lon2]], color="blue", weight=3, opacity=0.7).add_to(map_route)
+        lat1, lon1 = loc_start
+        lat2, lon2 = loc_end
+        # Reuse the rendered map while start and destination stay the same
+        map_key = map_cache.content_key(markers=[[lat1, lon1, "home"], [lat2, lon2, "flag"]], polyline=[[lat1, lon1], [lat2, lon2]])
+
+        def build_map():
+            map_route = folium.Map(location=[(lat1+lat2)/2, (lon1+lon2)/2], zoom_start=13)
+            folium.Marker(
+                [lat1, lon1], popup="Start",
+                icon=folium.Icon(color='green', icon='glyphicon-home')
+            ).add_to(map_route)
+            folium.Marker(
+                [lat2, lon2], popup="Destination",
+                icon=folium.Icon(color='red', icon='glyphicon-flag')
+            ).add_to(map_route)
+            folium.PolyLine([[lat1, lon1], [lat2, lon2]], color="blue", weight=3, opacity=0.7).add_to(map_route)
+            return map_route
+
         st.markdown("**Map with route:**")
-        st.components.v1.html(map_route._repr_html_(), width=700, height=500)
+        map_html = map_cache.cached_map_html(map_key, build_map, render=lambda m: m._repr_html_())
+        st.components.v1.html(map_html, width=700, height=500)
 
         # Distance and time estimate
         dist_km = geodistance((lat1, lon1), (lat2, lon2)).km
@@ -199,39 +157,13 @@ else:
 # --- Simulated Traffic Chart ---
 st.header("📈 Simulated Traffic Chart")
 def create_traffic_chart(city):
-    hours = list(range(24))
-    base_traffic = [
-        0.2, 0.1, 0.1, 0.1, 0.2, 0.4, 0.6, 0.9, 1.0, 0.8,
-        0.6, 0.5, 0.7, 0.7, 0.5, 0.6, 0.8, 1.0, 0.9, 0.7,
-        0.5, 0.4, 0.3, 0.2
-    ]
-    random.seed(int(datetime.now().timestamp()) % 100)
-    traffic = [max(0, min(1, t + (random.random() - 0.5) * 0.2)) for t in base_traffic]
-    current_hour = datetime.now().hour
-    df = pd.DataFrame({
-        'Hour': hours,
-        'Traffic': traffic,
-        'TimeLabel': [f"{h:02d}:00" for h in hours],
-        'Now': [h == current_hour for h in hours]
-    })
-    chart = alt.Chart(df).mark_line(color='blue', strokeWidth=3).encode(
-        x=alt.X('Hour:Q', axis=alt.Axis(title='Hour of Day', values=list(range(0, 24, 2)))),
-        y=alt.Y('Traffic:Q', axis=alt.Axis(title='Traffic Level', format='.0%'), scale=alt.Scale(domain=[0, 1])),
-        tooltip=['TimeLabel', 'Traffic']
-    )
-    dots = alt.Chart(df).mark_circle(color='blue', size=60).encode(
-        x='Hour:Q', y='Traffic:Q', tooltip=['TimeLabel', 'Traffic']
-    )
-    now_dot = alt.Chart(df[df['Now']]).mark_circle(color='red', size=100).encode(
-        x='Hour:Q', y='Traffic:Q', tooltip=['TimeLabel', alt.Tooltip('Traffic', title='Current')]
+    return traffic_chart.traffic_chart_spec(
+        city, title=f"Estimated Traffic for {city.capitalize()}", width=700, height=400,
+        title_size=18, point_size=60, highlight_size=100, y_title='Traffic Level', y_format='.0%'
     )
-    return (chart + dots + now_dot).properties(
-        title=f"Estimated Traffic for {city.capitalize()}",
-        width=700, height=400
-    ).configure_title(fontSize=18)
 
 if city:
-    traffic_chart = create_traffic_chart(city)
-    st.altair_chart(traffic_chart, use_container_width=True)
+    traffic_spec = create_traffic_chart(city)
+    st.vega_lite_chart(traffic_spec, use_container_width=True)
 else:
     st.info("Enter city to display traffic chart.")
@@ -0,0 +1,109 @@
+"""Size-bounded TTL cache with LRU eviction and stale-while-revalidate.
+
+Entries younger than `ttl` are served as-is. Entries between `ttl` and
+`ttl + stale_ttl` are still served, but one background thread refreshes the
+key so the next caller sees fresh data; only one refresh per key runs at a
+time. Older entries are treated as a miss and loaded in the caller's thread.
+When the cache holds more than `max_entries` (or, with `max_bytes`, more than
+that many bytes as measured by `sizeof`), the least recently used entries are
+evicted.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after `ttl` seconds"""
+
+    def __init__(self, ttl=600, max_entries=256, stale_ttl=None, max_bytes=None, sizeof=len):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.bytes = 0
+        # By default a stale entry may be served for one extra TTL while refreshing
+        self.stale_ttl = ttl if stale_ttl is None else stale_ttl
+        self._entries = OrderedDict()  # key -> (stored_at, value, size)
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def _age(self, key):
+        entry = self._entries.get(key)
+        return None if entry is None else time.monotonic() - entry[0]
+
+    def contains(self, key):
+        """True if `key` can be served without a blocking load"""
+        with self._lock:
+            age = self._age(key)
+            return age is not None and age < self.ttl + self.stale_ttl
+
+    def put(self, key, value):
+        size = self.sizeof(value) if self.max_bytes is not None else 0
+        with self._lock:
+            self._pop(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                return  # would evict everything else and still not fit
+            self._entries[key] = (time.monotonic(), value, size)
+            self.bytes += size
+            while len(self._entries) > self.max_entries or (
+                self.max_bytes is not None and self.bytes > self.max_bytes
+            ):
+                self.bytes -= self._entries.popitem(last=False)[1][2]
+
+    def _pop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[2]
+
+    def invalidate(self, key=None):
+        """Drop one key, or everything when no key is given"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                self.bytes = 0
+            else:
+                self._pop(key)
+
+    def get(self, key, loader, cache_if=None):
+        """Return the cached value for `key`, calling `loader()` on a miss.
+
+        `cache_if(value)` decides whether a freshly loaded value is stored, so
+        errors returned by a provider are not cached.
+        """
+        with self._lock:
+            age = self._age(key)
+            if age is not None and age < self.ttl + self.stale_ttl:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                value = self._entries[key][1]
+                if age >= self.ttl and key not in self._refreshing:
+                    self._refreshing.add(key)
+                    threading.Thread(
+                        target=self._refresh, args=(key, loader, cache_if), daemon=True
+                    ).start()
+                return value
+            self.misses += 1
+
+        value = loader()
+        if cache_if is None or cache_if(value):
+            self.put(key, value)
+        return value
+
+    def _refresh(self, key, loader, cache_if):
+        try:
+            value = loader()
+            if cache_if is None or cache_if(value):
+                self.put(key, value)
+        except Exception:
+            # Keep serving the stale entry; the next stale hit retries
+            pass
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
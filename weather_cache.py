@@ -0,0 +1,61 @@
+"""Shared weather cache so reruns don't call OpenWeatherMap on every widget change.
+
+Conditions change over minutes, so lookups are keyed by the normalized city
+name (or by lat/lon rounded to roughly 1 km) and kept for WEATHER_CACHE_TTL
+seconds in the shared "weather" cache (see shared_cache). Expired entries keep
+being served while one background refresh runs.
+"""
+import unicodedata
+
+import shared_cache
+
+# Two decimals is about 1.1 km of latitude, well inside one weather cell
+COORD_PRECISION = 2
+
+_cache = shared_cache.get_cache("weather")
+
+
+def normalize_city(city):
+    """'  São  Paulo ' -> 'sao paulo'"""
+    text = unicodedata.normalize("NFKD", city.strip().casefold())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(text.split())
+
+
+def city_key(city):
+    return ("city", normalize_city(city))
+
+
+def coord_key(lat, lon, precision=COORD_PRECISION):
+    return ("coord", round(float(lat), precision), round(float(lon), precision))
+
+
+def is_cached(city):
+    """True if the weather for `city` can be served without waiting on the API"""
+    return _cache.contains(city_key(city))
+
+
+def cached_weather(city, loader):
+    """Return `loader()` for `city`, served from the cache when possible.
+
+    `loader` returns the apps' usual `(success, data)` tuple; only successful
+    lookups are cached so a typo or an API error is retried on the next rerun.
+    """
+    return _cache.get(city_key(city), loader, cache_if=lambda result: result[0])
+
+
+def cached_weather_at(lat, lon, loader):
+    """Same as cached_weather, keyed by quantized coordinates"""
+    return _cache.get(coord_key(lat, lon), loader, cache_if=lambda result: result[0])
+
+
+def refresh(city, loader):
+    """Call `loader()` now and store a successful result for `city`, replacing any cached one"""
+    result = loader()
+    if result[0]:
+        _cache.put(city_key(city), result)
+    return result
+
+
+def clear():
+    _cache.invalidate()
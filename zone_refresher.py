@@ -0,0 +1,166 @@
+"""One background refresher for the zones that open sessions are showing.
+
+The auto-refresh in the apps compared st.session_state.last_refresh on every
+run and called st.experimental_rerun(), so each open session re-ran the whole
+script and refetched weather and news on its own schedule: 50 couriers
+watching Barcelona meant 50 refresh cycles. Here a session registers the zone
+it shows with watch(), and one daemon thread per process refetches each active
+zone once per interval (the shortest one asked for), writing the answers into
+the shared weather and news caches.
+
+Each zone keeps a version number per section that only moves when the
+section's data actually changed. Each section a session shows polls
+versions(), which is an in-memory lookup, and reloads from the caches only
+when its own version is new, so a news update does not redraw the weather and
+the page never reruns as a whole. Zones that no session has polled
+for ZONE_IDLE_TIMEOUT seconds are dropped, so upstream calls grow with the
+number of zones, not sessions.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import logistics_core
+import news_cache
+import weather_cache
+
+# Seconds between scheduler passes; sessions check for new versions as often
+POLL_SECONDS = int(os.getenv("ZONE_POLL_SECONDS", "15"))
+MIN_INTERVAL = 60
+ZONE_IDLE_TIMEOUT = int(os.getenv("ZONE_IDLE_TIMEOUT", "900"))
+REFRESH_WORKERS = 8
+
+
+def zone_key(city, country):
+    """(' Málaga ', 'ES') -> ('malaga', 'es')"""
+    return weather_cache.normalize_city(city), country.strip().lower()
+
+
+def digest(value):
+    return hashlib.sha1(json.dumps(value, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def refresh_weather(city, country, keys):
+    return weather_cache.refresh(city, lambda: logistics_core.fetch_weather(city, keys["weather"]))
+
+
+def refresh_news(city, country, keys):
+    news_cache.expire(country, city)
+    return logistics_core.get_news(country, city, keys["news"])
+
+
+# section -> refresh(city, country, keys) -> (success, data)
+SECTIONS = {"weather": refresh_weather, "news": refresh_news}
+
+
+class _Zone:
+    __slots__ = ("city", "country", "keys", "interval", "last_seen", "next_due", "refreshed_at",
+                 "versions", "digests")
+
+    def __init__(self, city, country, keys, interval, now):
+        self.city = city
+        self.country = country
+        self.keys = keys
+        self.interval = interval
+        self.last_seen = now
+        # The registering session has just loaded the zone through the caches
+        self.next_due = now + interval
+        self.refreshed_at = None
+        self.versions = dict.fromkeys(SECTIONS, 0)
+        self.digests = {}
+
+
+class ZoneRefresher:
+    """Refreshes every watched zone on one daemon thread"""
+
+    def __init__(self, sections=SECTIONS, poll=POLL_SECONDS):
+        self.sections = sections
+        self.poll = poll
+        self._zones = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=REFRESH_WORKERS, thread_name_prefix="zone-refresh")
+        self._thread = threading.Thread(target=self._run, name="zone-refresher", daemon=True)
+        self._thread.start()
+
+    def watch(self, city, country, interval, weather_key, news_key):
+        """Register (or keep alive) a zone refreshed every `interval` seconds; returns its key"""
+        key = zone_key(city, country)
+        interval = max(MIN_INTERVAL, interval)
+        now = time.monotonic()
+        with self._lock:
+            zone = self._zones.get(key)
+            if zone is None:
+                zone = self._zones[key] = _Zone(city, country, {"weather": weather_key, "news": news_key},
+                                                interval, now)
+            elif interval < zone.interval:
+                zone.interval = interval
+                zone.next_due = min(zone.next_due, now + interval)
+            zone.last_seen = now
+        return key
+
+    def versions(self, key):
+        """{section: version} for a watched zone; also keeps the zone active"""
+        with self._lock:
+            zone = self._zones.get(key)
+            if zone is None:
+                return {}
+            zone.last_seen = time.monotonic()
+            return dict(zone.versions)
+
+    def next_refresh_in(self, key):
+        """Seconds until the zone is refreshed again, or None if it is not watched"""
+        with self._lock:
+            zone = self._zones.get(key)
+            return None if zone is None else max(0.0, zone.next_due - time.monotonic())
+
+    def interval(self, key):
+        with self._lock:
+            zone = self._zones.get(key)
+            return None if zone is None else zone.interval
+
+    def _run(self):
+        while True:
+            time.sleep(self.poll)
+            now = time.monotonic()
+            with self._lock:
+                for key, zone in list(self._zones.items()):
+                    if now - zone.last_seen > ZONE_IDLE_TIMEOUT:
+                        del self._zones[key]
+                due = [zone for zone in self._zones.values() if zone.next_due <= now]
+            # Wait for the batch so a slow provider cannot pile up refreshes of one zone
+            list(self._pool.map(self._refresh, due))
+
+    def _refresh(self, zone):
+        for name, refresh in self.sections.items():
+            try:
+                success, data = refresh(zone.city, zone.country, zone.keys)
+            except Exception:
+                continue
+            if not success:
+                # Sessions keep showing the cached answer; nothing new to render
+                continue
+            d = digest(data)
+            with self._lock:
+                if zone.digests.get(name) != d:
+                    zone.digests[name] = d
+                    zone.versions[name] = zone.versions.get(name, 0) + 1
+        with self._lock:
+            zone.refreshed_at = time.time()
+            zone.next_due = time.monotonic() + zone.interval
+
+
+_refresher = None
+_refresher_lock = threading.Lock()
+
+
+def get_refresher():
+    """Process-wide refresher, started on first use"""
+    global _refresher
+    if _refresher is None:
+        with _refresher_lock:
+            if _refresher is None:
+                _refresher = ZoneRefresher()
+    return _refresher